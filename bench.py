@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# bench.py  (offline end-to-end benchmark)
+"""
+Runs the real pipeline end to end without touching any real service:
+
+    camera    fake camera (a generated still, or --source image/video)
+    FaceCheck facecheck_stub.py on a local port (PimEyes is disabled)
+    cache     off, so every run really uploads and polls
+
+Two flavours are timed:
+    cold   `python run_automations.py` per run (interpreter + imports each time)
+    warm   run_automations.main() repeated in this process (UI in-process mode)
+and, when PyQt6 is available, the UI rendering of the last run's output
+and the UI's cold start (`python ui.py --exit-after-paint`, time to first paint).
+
+    python bench.py --runs 3 --json bench.json
+    python bench.py --baseline bench.json          # exit 1 on regression
+"""
+
+import sys, os, json, time, argparse, tempfile, subprocess, statistics
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, REPO)
+
+import events, facecheck_stub
+
+
+class _Collector:
+    """stdout sink keeping (seconds since start, line) for every line."""
+
+    def __init__(self):
+        self.t0, self.lines, self.buf = time.perf_counter(), [], ""
+
+    def write(self, s):
+        self.buf += s
+        *lines, self.buf = self.buf.split("\n")
+        now = time.perf_counter() - self.t0
+        self.lines.extend((now, l) for l in lines)
+        return len(s)
+
+    def flush(self):
+        pass
+
+
+def fake_camera(path):
+    import cv2, numpy as np
+    h, w = 720, 1280
+    img = np.zeros((h, w, 3), np.uint8)
+    img[:] = np.linspace(40, 200, w, dtype=np.uint8)[None, :, None]
+    cv2.circle(img, (w // 2, h // 2), 200, (180, 160, 140), -1)
+    cv2.imwrite(path, img)
+    return path
+
+
+def write_config(workdir, source, mode):
+    cfg = {
+        "webcam_index": 0,
+        "camera_source": source,
+        "stage_mode": mode,
+        "cache": {"enabled": False, "purge_on_exit": False},
+        "providers": {
+            "pimeyes":   {"enabled": False},
+            "facecheck": {"enabled": True, "testing_mode": True},
+        },
+    }
+    with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(cfg, f, indent=2)
+
+
+def digest(lines, wall):
+    """
+    Reduce one run's (t, line) output to the numbers we track.  A run that
+    produced no snapshot, no match or a stage with a non-zero rc gets a
+    "failed" entry instead of counting as a (suspiciously fast) result.
+    """
+    out, failed = {"wall_ms": round(wall * 1000, 1)}, []
+    for t, line in lines:
+        evt = events.decode(line)
+        if evt["type"] == "done" and evt.get("rc"):
+            failed.append(f"{evt.get('stage', 'run')} rc={evt['rc']}")
+        elif evt["type"] == "error":
+            failed.append(evt.get("message", "error"))
+        if evt["type"] == "snap_complete":
+            out.setdefault("snap_ms", round(t * 1000, 1))
+        elif evt["type"] == "match":
+            out.setdefault("first_match_ms", round(t * 1000, 1))
+        elif evt["type"] == "summary":
+            for key, s in evt["spans"].items():
+                out[f"{key}.total_ms"] = s["total_ms"]
+                if key.endswith(".poll"):
+                    out[f"{key}.count"] = s["count"]
+    if "snap_ms" not in out:
+        failed.append("no snapshot")
+    if "first_match_ms" not in out:
+        failed.append("no match")
+    if failed:
+        out["failed"] = failed
+    return out
+
+
+def run_cold(workdir, env):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO, "run_automations.py")],
+                            cwd=workdir, env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True, encoding="utf-8")
+    lines = [(time.perf_counter() - t0, l.rstrip("\n")) for l in proc.stdout]
+    proc.wait()
+    return digest(lines, time.perf_counter() - t0)
+
+
+def run_warm(workdir):
+    import run_automations, stages
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        sink = _Collector()
+        with stages.route_stdout(sink):
+            run_automations.main([])
+        return digest(sink.lines, time.perf_counter() - sink.t0), [l for _, l in sink.lines]
+    finally:
+        os.chdir(cwd)
+
+
+def bench_ui(lines):
+    """Feed a run's output through AutomationUI offscreen; returns UI span totals."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt6.QtWidgets import QApplication
+        import ui, metrics
+    except ImportError:
+        return {}
+    app = QApplication.instance() or QApplication([])
+    w = ui.AutomationUI()
+    t0 = time.perf_counter()
+    for line in lines:
+        w.handle_output(line)
+    w.flush_output()
+    while w.loaders:                          # wait for the preview decode
+        app.processEvents()
+    out = {"ui.handle_all_ms": round((time.perf_counter() - t0) * 1000, 1)}
+    for key, s in metrics.summarize(w.ui_spans).items():
+        out[f"{key}.total_ms"] = s["total_ms"]
+    return out
+
+
+def bench_startup(workdir, env, runs):
+    """Cold UI start: wall time of `ui.py --exit-after-paint` and its first_paint metric."""
+    env = dict(env, QT_QPA_PLATFORM=env.get("QT_QPA_PLATFORM", "offscreen"))
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, os.path.join(REPO, "ui.py"), "--exit-after-paint"],
+                              cwd=workdir, env=env, capture_output=True, text=True, encoding="utf-8")
+        if proc.returncode != 0:
+            return {}
+        d = {"ui.startup_wall_ms": round((time.perf_counter() - t0) * 1000, 1)}
+        for line in proc.stdout.splitlines():
+            evt = events.decode(line)
+            if evt["type"] == "metric" and evt.get("name") == "first_paint":
+                d["ui.first_paint_ms"] = evt["ms"]
+        out.append(d)
+    return median(out)
+
+
+def median(runs):
+    keys = {k for r in runs for k in r}
+    return {k: round(statistics.median(r[k] for r in runs if k in r), 1) for k in sorted(keys)}
+
+
+def compare(result, baseline, tolerance):
+    """Timing keys that got slower than baseline by more than `tolerance` (fraction)."""
+    worse = []
+    for section in ("cold", "warm", "ui"):
+        for k, v in result.get(section, {}).items():
+            old = baseline.get(section, {}).get(k)
+            if old and k.endswith("_ms") and v > old * (1 + tolerance) and v - old > 5:
+                worse.append(f"{section}.{k}: {old} -> {v} ms")
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--mode", choices=("inprocess", "subprocess"), default="inprocess",
+                        help="stage mode used inside each pipeline run")
+    parser.add_argument("--source", help="fake camera image/video (default: generated still)")
+    parser.add_argument("--search-seconds", type=float, default=2.0,
+                        help="how long the stub FaceCheck search takes")
+    parser.add_argument("--matches", type=int, default=50)
+    parser.add_argument("--no-ui", action="store_true", help="skip the UI rendering benchmark")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against an earlier --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    server, url = facecheck_stub.serve(duration=args.search_seconds, matches=args.matches)
+    os.environ["FACECHECK_SITE"] = url
+    os.environ["FACECHECK_API_TOKEN"] = "bench"           # the stub accepts any token
+    env = dict(os.environ, PYTHONPATH=REPO + os.pathsep + os.environ.get("PYTHONPATH", ""))
+
+    with tempfile.TemporaryDirectory(prefix="cctp_bench_") as workdir:
+        source = os.path.abspath(args.source) if args.source else \
+                 fake_camera(os.path.join(workdir, "fake_camera.jpg"))
+        write_config(workdir, source, args.mode)
+
+        print(f"stub FaceCheck at {url}, fake camera {source}, {args.runs} run(s), mode {args.mode}")
+        cold = [run_cold(workdir, env) for _ in range(args.runs)]
+        warm, lines = [], []
+        for _ in range(args.runs):
+            d, lines = run_warm(workdir)
+            warm.append(d)
+        broken = [f"{kind} run {i + 1}: {', '.join(r.pop('failed'))}"
+                  for kind, runs in (("cold", cold), ("warm", warm))
+                  for i, r in enumerate(runs) if "failed" in r]
+        if broken:
+            server.shutdown()
+            print("\nBROKEN RUNS (no timings reported):\n  " + "\n  ".join(broken))
+            return 2
+        ui_res = {} if args.no_ui else {**bench_ui(lines), **bench_startup(workdir, env, args.runs)}
+
+    server.shutdown()
+    result = {"cold": median(cold), "warm": median(warm), "ui": ui_res, "stub": server.stats,
+              "runs": args.runs, "mode": args.mode}
+
+    for section in ("cold", "warm", "ui"):
+        print(f"\n[{section}]")
+        for k, v in result[section].items():
+            print(f"  {k:<34}{v:>10}")
+    print(f"\n[stub] {server.stats}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            worse = compare(result, json.load(f), args.tolerance)
+        if worse:
+            print("\nREGRESSIONS:\n  " + "\n  ".join(worse))
+            return 1
+        print("\nno regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# cancel.py  (cooperative cancellation for the in-process pipeline)
+"""
+One cancellation flag per process (there is only ever one run at a time).
+
+Stage code
+    cancel.sleep(s)                  instead of time.sleep – raises Cancelled
+    cancel.check()                   in loops
+    cancel.wait(event, t)            instead of event.wait(t)
+    cancel.call(fn, *args)           a blocking call (HTTP request) a cancel
+                                     doesn't have to wait for
+    with cancel.resource("chrome", driver.quit):
+        ...                          released at once if the run is cancelled
+
+Controller (UI / Ctrl+C)
+    cancel.reset()                   before a run
+    report = cancel.request(limit)   wakes every wait, releases the registered
+                                     resources in parallel, waits at most
+                                     `limit` seconds and says what was freed
+    cancel.join(t)                   before exiting: give releases still
+                                     running after request() up to t seconds
+"""
+
+import threading, itertools, contextlib, time
+
+_event    = threading.Event()
+_lock     = threading.Lock()
+_releases = {}                           # id -> (name, fn)
+_ids      = itertools.count()
+_released = []                           # everything released since reset()
+_running   = []                          # (name, thread) releases request() left running
+
+
+class Cancelled(BaseException):
+    """Raised inside a stage once the run is cancelled (BaseException so the
+    broad `except Exception` handlers in the stages don't swallow it)."""
+
+
+def reset():
+    _event.clear()
+    _released.clear()
+
+def released() -> list:
+    return list(_released)
+
+def requested() -> bool:
+    return _event.is_set()
+
+def check():
+    if _event.is_set():
+        raise Cancelled()
+
+def sleep(seconds: float):
+    if _event.wait(seconds):
+        raise Cancelled()
+
+def wait(event, timeout: float) -> bool:
+    """event.wait(timeout) that raises Cancelled within ~50 ms of a cancel."""
+    deadline = time.monotonic() + timeout
+    while not event.wait(min(0.05, max(0.0, deadline - time.monotonic()))):
+        check()
+        if time.monotonic() >= deadline:
+            return False
+    return True
+
+def call(fn, *args, **kw):
+    """
+    fn(*args, **kw) in a daemon thread; the caller gets its result, or
+    Cancelled within ~50 ms of a cancel while the call is left to finish
+    (or time out) on its own.
+    """
+    done, box = threading.Event(), {}
+    def run():
+        try:
+            box["value"] = fn(*args, **kw)
+        except BaseException as e:
+            box["error"] = e
+        finally:
+            done.set()
+    threading.Thread(target=run, daemon=True).start()
+    while not wait(done, 3600):
+        pass
+    if "error" in box:
+        raise box["error"]
+    return box["value"]
+
+
+def register(name: str, release) -> int:
+    """
+    Track a resource for request().  If the run is already cancelled (e.g.
+    Stop came while Chrome was still starting) it is released right here,
+    since request() has already emptied the registry.
+    """
+    with _lock:
+        rid = next(_ids)
+        if not _event.is_set():
+            _releases[rid] = (name, release)
+            return rid
+    try:
+        release()
+        _released.append(name)
+    except Exception as e:
+        _released.append(f"{name} ({e})")
+    return rid
+
+def unregister(rid: int) -> bool:
+    """True if the resource was still registered, i.e. the caller must release it."""
+    with _lock:
+        return _releases.pop(rid, None) is not None
+
+@contextlib.contextmanager
+def resource(name: str, release):
+    rid = register(name, release)
+    try:
+        yield
+    finally:
+        unregister(rid)
+
+
+def request(limit: float = 0.5) -> dict:
+    """
+    Cancel the current run.  Returns {"released": [...], "pending": [...],
+    "seconds": t} – pending are releases still running when `limit` hit.
+    """
+    t0 = time.perf_counter()
+    _event.set()
+    with _lock:
+        items = list(_releases.values())
+        _releases.clear()
+
+    done, failed = [], []
+    def run(name, fn):
+        try:
+            fn(); done.append(name)
+        except Exception as e:
+            failed.append(f"{name} ({e})")
+
+    threads = [threading.Thread(target=run, args=item, daemon=True) for item in items]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(max(0.0, limit - (time.perf_counter() - t0)))
+
+    started = [(name, t) for (name, _), t in zip(items, threads)]
+    _running[:] = [(n, t) for n, t in _running + started if t.is_alive()]
+    pending = [n for n, t in started if t.is_alive()]
+    _released.extend(done + failed)
+    return {"released": done + failed, "pending": pending,
+            "seconds": round(time.perf_counter() - t0, 3)}
+
+def join(timeout: float) -> list:
+    """Wait up to `timeout` for releases request() left running; returns those still running."""
+    deadline = time.monotonic() + timeout
+    for _, t in _running:
+        t.join(max(0.0, deadline - time.monotonic()))
+    return [name for name, t in _running if t.is_alive()]
@@ -0,0 +1,214 @@
+# capture_service.py  (camera sources + warm capture service)
+"""
+Frame sources for takePicture.py:
+
+    webcam index  -> cv2.VideoCapture, trying the backends that work on this
+                     platform (DirectShow/MSMF, AVFoundation, V4L2, then any)
+    image file    -> the same still frame, forever (fake camera)
+    video file    -> the clip, looped at its own frame rate (fake camera)
+
+A frame counts as ready once the picture's mean brightness has settled
+(auto-exposure done) instead of after a fixed sleep.  CaptureService keeps
+a source open in a background thread while the UI runs, so a snapshot is
+taken from an already warm camera.
+"""
+
+import os, sys, time, threading
+import cv2
+
+import cancel
+
+STABLE_FRAMES = 5        # consecutive frames whose brightness must agree
+STABLE_DELTA  = 2.0      # max brightness spread (0-255) across those frames
+MIN_BRIGHT    = 8.0      # a black frame is never "ready"
+MAX_WAIT      = 3.0      # give up waiting for stability after this long
+
+
+def backends():
+    if sys.platform.startswith("win"):
+        return [cv2.CAP_DSHOW, cv2.CAP_MSMF, cv2.CAP_ANY]
+    if sys.platform == "darwin":
+        return [cv2.CAP_AVFOUNDATION, cv2.CAP_ANY]
+    return [cv2.CAP_V4L2, cv2.CAP_ANY]
+
+
+class StillSource:
+    """Fake camera serving one image file."""
+
+    def __init__(self, path):
+        self.frame = cv2.imread(path)
+
+    def isOpened(self):
+        return self.frame is not None
+
+    def read(self):
+        time.sleep(1 / 30)                   # behave like a 30 fps camera
+        return self.frame is not None, self.frame
+
+    def release(self):
+        self.frame = None
+
+
+class VideoFileSource:
+    """Fake camera looping a video file in real time."""
+
+    def __init__(self, path):
+        self.cap      = cv2.VideoCapture(path)
+        self.interval = 1 / (self.cap.get(cv2.CAP_PROP_FPS) or 30)
+        self.next     = time.monotonic()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        delay = self.next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.next = max(self.next, time.monotonic()) + self.interval
+        ok, frame = self.cap.read()
+        if not ok:                           # end of clip -> rewind
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        return ok, frame
+
+    def release(self):
+        self.cap.release()
+
+
+def open_source(source):
+    """
+    Open a webcam index or a fake-camera file; returns (source, description)
+    or (None, reason).
+    """
+    if isinstance(source, str) and not source.isdigit():
+        if not os.path.exists(source):
+            return None, f"fake camera file not found: {source}"
+        src = StillSource(source) if cv2.haveImageReader(source) else VideoFileSource(source)
+        return (src, f"file {source}") if src.isOpened() else (None, f"cannot read {source}")
+
+    index = int(source)
+    for api in backends():
+        cap = cv2.VideoCapture(index, api)
+        if cap.isOpened():
+            return cap, f"webcam {index} ({cap.getBackendName()})"
+        cap.release()
+    return None, f"cannot open webcam {index}"
+
+
+def brightness(frame) -> float:
+    small = cv2.resize(frame, (64, 48), interpolation=cv2.INTER_AREA)
+    return float(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).mean())
+
+
+class Readiness:
+    """Feed frames in; `ready` turns True once exposure has settled."""
+
+    def __init__(self):
+        self.recent = []
+
+    def feed(self, frame) -> bool:
+        self.recent = (self.recent + [brightness(frame)])[-STABLE_FRAMES:]
+        return self.ready
+
+    @property
+    def ready(self) -> bool:
+        r = self.recent
+        return (len(r) == STABLE_FRAMES and min(r) >= MIN_BRIGHT
+                and max(r) - min(r) <= STABLE_DELTA)
+
+
+def grab_ready(cap, max_wait=MAX_WAIT):
+    """Read until the picture is stable (or max_wait passes); returns the frame."""
+    detector, frame = Readiness(), None
+    deadline = time.monotonic() + max_wait
+    while True:
+        cancel.check()
+        ok, f = cap.read()
+        if ok:
+            frame = f
+            if detector.feed(f):
+                return frame
+        else:
+            cancel.sleep(0.01)                  # failing source: don't spin (as _loop does)
+        if time.monotonic() >= deadline:
+            return frame
+
+
+class CaptureService:
+    """
+    Keeps one source open and reads it continuously in a background thread.
+    snapshot() returns the newest frame as soon as exposure is stable.
+    """
+
+    def __init__(self, source):
+        self.source   = source
+        self.cap      = None
+        self.desc     = ""
+        self.frame    = None
+        self.detector = Readiness()
+        self.lock     = threading.Lock()
+        self.ready    = threading.Event()
+        self.opened   = threading.Event()
+        self.running  = True
+        self.thread   = threading.Thread(target=self._loop, name="capture-service", daemon=True)
+        self.thread.start()
+
+    def _loop(self):
+        self.cap, self.desc = open_source(self.source)
+        self.opened.set()
+        if self.cap is None:
+            return
+        try:
+            while self.running:
+                ok, frame = self.cap.read()
+                if not ok:
+                    time.sleep(0.01)
+                    continue
+                with self.lock:
+                    self.frame = frame
+                    if self.detector.feed(frame):
+                        self.ready.set()
+        finally:
+            self.cap.release()
+
+    def snapshot(self, max_wait=MAX_WAIT):
+        """Newest frame once ready (or whatever is there after max_wait); None if closed."""
+        cancel.wait(self.opened, max_wait)
+        if self.cap is None:
+            return None
+        cancel.wait(self.ready, max_wait)
+        with self.lock:
+            return None if self.frame is None else self.frame.copy()
+
+    def close(self, timeout=0.5):
+        """Stop reading; True once the camera is released (within `timeout`)."""
+        self.running = False
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+
+# ---------- process-wide warm service (started by the UI) ----------
+_service = None
+
+def start(source) -> CaptureService:
+    global _service
+    if _service is None or _service.source != source or not _service.thread.is_alive():
+        stop()
+        _service = CaptureService(source)
+    return _service
+
+def current(source=None):
+    """The running service, if it serves `source` (any source if None)."""
+    s = _service
+    if s and s.thread.is_alive() and (source is None or s.source == source):
+        return s
+    return None
+
+def stop(timeout=0.5):
+    """Close the warm service; returns its description if one was running."""
+    global _service
+    s, _service = _service, None
+    if s is None:
+        return None
+    released = s.close(timeout)
+    return (s.desc or "camera") + ("" if released else " (still closing)")
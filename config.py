@@ -0,0 +1,266 @@
+# config.py  (the one place config.json is read and written)
+"""
+    cfg = config.get()            validated config, defaults filled in
+    config.update(changes)        deep-merge into config.json (atomic write)
+    config.subscribe(fn)          fn(cfg) after every change
+    config.api_token("facecheck") the provider's secret (never in config.json)
+
+The file is parsed once and cached; get() reads it again only when its
+mtime changed (someone edited it by hand) and then tells subscribers too.
+Nothing polls: a long-running process that wants hand edits pushed to it
+watches CONFIG_FILE and calls get() on change (the UI does, with a
+QFileSystemWatcher).  Invalid values are reported and replaced by their
+default, unknown keys are kept as they are.
+
+API tokens are looked up in this order:
+    FACECHECK_API_TOKEN        environment override
+    keyring                    OS secret store (`keyring` package, in
+                               requirements.txt) if it has a backend
+    ~/.cctp_secrets.json       fallback: PLAIN TEXT, owner-only (0600) on
+                               POSIX, unprotected on Windows; a warning is
+                               printed whenever a token is stored there
+A token still found in config.json is moved to the secret store on load.
+"""
+
+import os, json, copy, threading
+
+import log_store, image_opt
+from stages import MODES
+
+CONFIG_FILE     = "config.json"
+SECRETS_FILE    = os.path.join(os.path.expanduser("~"), ".cctp_secrets.json")
+KEYRING_SERVICE = "cctp"
+SECRET_FIELDS   = ("api_token",)
+PLAINTEXT_NOTE  = (f"{SECRETS_FILE}, a plain-text file (owner-only on Linux/macOS, "
+                   f"not protected at all on Windows); install a keyring backend to avoid it")
+
+DEFAULTS = {
+    "webcam_index":  0,
+    "camera_source": None,          # image/video file = fake camera
+    "warm_camera":   False,         # UI keeps the camera open between runs
+    "stage_mode":    "inprocess",
+    "cache": {"enabled": True, "ttl_hours": 24.0, "max_mb": 20.0, "purge_on_exit": True},
+    "logs":  dict(log_store.DEFAULTS),
+    "ui":    {"log_max_blocks": 5000,   # log view keeps at most this many lines
+              "flush_ms":       100},   # output is coalesced and painted this often
+    "providers": {
+        "pimeyes":   {"enabled": True, "upload": dict(image_opt.DEFAULTS["pimeyes"])},
+        "facecheck": {"enabled": True, "testing_mode": True,
+                      "upload": dict(image_opt.DEFAULTS["facecheck"])},
+    },
+}
+CHOICES = {"stage_mode": MODES}
+RANGES  = {**{f"providers.{p}.upload.jpeg_quality": (1, 100) for p in image_opt.DEFAULTS},
+           **{f"providers.{p}.upload.max_side": (64, 16384) for p in image_opt.DEFAULTS}}
+ZERO_IS_OFF = {f"providers.{p}.upload.max_side" for p in image_opt.DEFAULTS}   # 0 = don't resize
+
+_lock        = threading.RLock()
+_cached      = {"stamp": None, "cfg": None}
+_subscribers = []
+
+
+# ---------- validation ----------
+def validate(raw: dict):
+    """(config, problems): `raw` merged over DEFAULTS, bad values replaced."""
+    problems = []
+
+    def merge(default, value, path):
+        if isinstance(default, dict):
+            if not isinstance(value, dict):
+                if value is not None:
+                    problems.append(f"{path} should be an object")
+                value = {}
+            out = {k: merge(v, value.get(k), f"{path}.{k}" if path else k)
+                   for k, v in default.items()}
+            out.update({k: v for k, v in value.items() if k not in default})
+            return out
+        if value is None:
+            return default
+        if default is None or isinstance(default, str):
+            ok = isinstance(value, str) and value in CHOICES.get(path, (value,))
+        elif isinstance(default, bool):
+            ok = isinstance(value, bool)
+        else:
+            lo, hi = RANGES.get(path, (0, float("inf")))
+            kinds  = int if type(default) is int else (int, float)   # counts, indices, pixels
+            ok = isinstance(value, kinds) and not isinstance(value, bool) \
+                 and (lo <= value <= hi or (value == 0 and path in ZERO_IS_OFF))
+        if not ok:
+            problems.append(f"{path}={value!r} is invalid, using {default!r}")
+            return default
+        return value
+
+    return merge(DEFAULTS, raw, ""), problems
+
+
+# ---------- file ----------
+def _stamp():
+    try:
+        st = os.stat(CONFIG_FILE)
+        return os.path.abspath(CONFIG_FILE), st.st_mtime_ns, st.st_size
+    except OSError:
+        return os.path.abspath(CONFIG_FILE), None, None
+
+def _read_raw() -> dict:
+    if not os.path.exists(CONFIG_FILE):
+        return {}
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        return raw if isinstance(raw, dict) else {}
+    except (OSError, ValueError):
+        print("Config corrupted, using defaults.")
+        return {}
+
+def _write_raw(raw: dict):
+    tmp = CONFIG_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(raw, f, indent=2)
+    os.replace(tmp, CONFIG_FILE)
+
+def _load() -> dict:
+    raw = _read_raw()
+    if _migrate_secrets(raw):
+        _write_raw(raw)
+    cfg, problems = validate(raw)
+    for p in problems:
+        print(f"config: {p}")
+    return cfg
+
+
+# ---------- public API ----------
+def get() -> dict:
+    """The current config (a copy); parsed again only if the file changed."""
+    with _lock:
+        stamp = _stamp()
+        if stamp != _cached["stamp"]:
+            edited = _cached["stamp"] is not None and _cached["stamp"][0] == stamp[0]
+            _cached["cfg"]   = _load()
+            _cached["stamp"] = _stamp()
+            if edited:
+                _notify()
+        return copy.deepcopy(_cached["cfg"])
+
+def update(changes: dict) -> dict:
+    """Deep-merge `changes` into config.json, validate, notify; returns the new config."""
+    def deep(dst, src):
+        for k, v in src.items():
+            if isinstance(v, dict) and isinstance(dst.get(k), dict):
+                deep(dst[k], v)
+            else:
+                dst[k] = v
+    with _lock:
+        raw = _read_raw()
+        deep(raw, copy.deepcopy(changes))
+        _migrate_secrets(raw)
+        _write_raw(raw)
+        _cached["stamp"] = None
+        get()
+        _notify()
+        return copy.deepcopy(_cached["cfg"])
+
+def subscribe(fn):
+    """Call fn(cfg) whenever the config changes; returns an unsubscribe function."""
+    _subscribers.append(fn)
+    return lambda: _subscribers.remove(fn) if fn in _subscribers else None
+
+def _notify():
+    cfg = _cached["cfg"]
+    for fn in list(_subscribers):
+        try:
+            fn(copy.deepcopy(cfg))
+        except Exception as e:
+            print(f"config subscriber failed: {e}")
+
+
+# ---------- secrets ----------
+def token_env(provider: str) -> str:
+    return f"{provider.upper()}_API_TOKEN"
+
+def _keyring():
+    try:
+        import keyring
+        return keyring
+    except ImportError:
+        return None
+
+def _read_secrets() -> dict:
+    try:
+        with open(SECRETS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_secrets(secrets: dict):
+    tmp = SECRETS_FILE + ".tmp"
+    fd  = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(secrets, f)
+    os.replace(tmp, SECRETS_FILE)
+
+def api_token(provider: str = "facecheck") -> str:
+    return token_source(provider)[0]
+
+def token_source(provider: str = "facecheck"):
+    """(token, where it came from) – "" / "" if there is none."""
+    env = os.environ.get(token_env(provider), "").strip()
+    if env:
+        return env, "environment"
+    kr = _keyring()
+    if kr:
+        try:
+            token = kr.get_password(KEYRING_SERVICE, provider)
+            if token:
+                return token, "keyring"
+        except Exception:                        # no usable backend
+            pass
+    token = _read_secrets().get(provider, "")
+    return (token, "secrets file") if token else ("", "")
+
+def set_api_token(provider: str, token: str) -> str:
+    """Store (or, if empty, delete) a provider token; returns where it went."""
+    token = (token or "").strip()
+    kr = _keyring()
+    if kr:
+        try:
+            if token:
+                kr.set_password(KEYRING_SERVICE, provider, token)
+            else:
+                try:
+                    kr.delete_password(KEYRING_SERVICE, provider)
+                except Exception:
+                    pass
+            _drop_secret_file_entry(provider)
+            return "keyring"
+        except Exception:
+            pass
+    secrets = _read_secrets()
+    if token:
+        secrets[provider] = token
+    else:
+        secrets.pop(provider, None)
+    _write_secrets(secrets)
+    if token:
+        print(f"config: warning: no usable keyring, {provider} token stored in {PLAINTEXT_NOTE}")
+    return "secrets file"
+
+def _drop_secret_file_entry(provider):
+    secrets = _read_secrets()
+    if provider in secrets:
+        del secrets[provider]
+        _write_secrets(secrets)
+
+def _migrate_secrets(raw: dict) -> bool:
+    """Move plaintext tokens out of `raw` into the secret store; True if any moved."""
+    moved = False
+    for provider, settings in (raw.get("providers") or {}).items():
+        if not isinstance(settings, dict):
+            continue
+        for field in SECRET_FIELDS:
+            if field in settings:
+                value = settings.pop(field)
+                if isinstance(value, str) and value.strip():
+                    where = set_api_token(provider, value)
+                    print(f"config: moved {provider} {field} out of {CONFIG_FILE} into the {where}")
+                moved = True
+    return moved
@@ -0,0 +1,88 @@
+# events.py  (pipeline -> UI protocol)
+"""
+Every line the pipeline writes to stdout is one JSON event:
+
+    {"v": 1, "type": "match", "stage": "facecheck", "score": 87.1, "url": "…"}
+
+Types and their fields:
+    log            text
+    snap_complete  jpeg (base64 of the captured frame)
+    progress       percent
+    match          score, url
+    result_url     url
+    error          message
+    done           rc, seconds for a stage; without "stage": whole run done, + log
+                   (+ cancelled: true when the run was stopped)
+    metric         name, ms (one timing span, see metrics.py)
+    summary        spans ({"stage.name": {count, total_ms, max_ms}}), end of run
+
+Plain-text lines (third-party noise, tracebacks, old scripts) decode to a
+"log" event, so a consumer only ever needs decode() + a switch on "type".
+The human-readable run log is render() applied to the same stream.
+"""
+
+import json
+
+VERSION = 1
+TYPES   = ("log", "snap_complete", "progress", "match", "result_url", "error", "done",
+           "metric", "summary")
+
+
+def make(type_: str, **fields) -> dict:
+    return {"v": VERSION, "type": type_, **fields}
+
+
+def encode(evt: dict) -> str:
+    return json.dumps(evt, ensure_ascii=False)
+
+
+def emit(type_: str, **fields):
+    """Print one event line (used by the stage modules)."""
+    print(encode(make(type_, **fields)), flush=True)
+
+
+def decode(line: str) -> dict:
+    line = line.rstrip("\r\n")
+    if line.startswith("{"):
+        try:
+            evt = json.loads(line)
+        except json.JSONDecodeError:
+            evt = None
+        if isinstance(evt, dict) and evt.get("type") in TYPES:
+            return evt
+    return make("log", text=line)
+
+
+def format_spans(spans: dict) -> list:
+    lines = [f"{'span':<24}{'count':>6}{'total ms':>12}{'max ms':>10}"]
+    for key, s in spans.items():
+        lines.append(f"{key:<24}{s['count']:>6}{s['total_ms']:>12.1f}{s['max_ms']:>10.1f}")
+    return lines
+
+
+def render(evt: dict) -> str:
+    t = evt.get("type")
+    if t == "snap_complete":
+        text = "SNAP_COMPLETE"
+    elif t == "progress":
+        text = f"progress {evt.get('percent')}%"
+    elif t == "match":
+        text = f"match {evt.get('score')} {evt.get('url')}"
+    elif t == "result_url":
+        text = f"Search Results URL: {evt.get('url')}"
+    elif t == "error":
+        text = f"ERROR: {evt.get('message')}"
+    elif t == "metric":
+        text = f"[timing] {evt.get('name')} {evt.get('ms')} ms"
+    elif t == "summary":
+        text = "timing summary\n" + "\n".join(format_spans(evt.get("spans", {})))
+    elif t == "done":
+        if evt.get("stage"):
+            text = f"finished rc={evt.get('rc')} in {evt.get('seconds')}s"
+        else:
+            word = "cancelled" if evt.get("cancelled") else "finished"
+            text = f"==== {word} ==== log: {evt.get('log', '')}"
+    else:
+        text = str(evt.get("text", ""))
+    stage = evt.get("stage")
+    return f"[{stage}] {text}" if stage else text
@@ -1,85 +1,139 @@
 # facecheck_search.py  (strict token required)
 """
-Called by run_automations.py:
-    python facecheck_search.py <image_path>
-
-Output lines (captured by UI):
-    FACECHECK_ERROR <msg>
-    FACECHECK_PROGRESS <percent>
-    FACECHECK_MATCH <score> <url>
-    FACECHECK_DONE
+Called by run_automations.py, either in-process:
+    facecheck_search.search(jpeg_bytes, api_token, testing_mode)
+or as a script (subprocess stage mode / manual use):
+    python facecheck_search.py <image_path> [--test]
+
+Output (JSON event lines, see events.py):
+    error     message
+    progress  percent
+    match     score, url
 """
 
-import sys, time, json, requests, os
+import sys, time, requests, os
 
-SITE   = "https://facecheck.id"
-CONFIG = "config.json"
+import events, metrics, cancel
 
-def load_settings():
-    if not os.path.exists(CONFIG):
-        print("FACECHECK_ERROR API_TOKEN_MISSING (config.json not found)")
-        sys.exit(1)
-
-    try:
-        with open(CONFIG, "r", encoding="utf-8") as f:
-            cfg = json.load(f)
-    except json.JSONDecodeError:
-        print("FACECHECK_ERROR API_TOKEN_MISSING (config.json invalid)")
-        sys.exit(1)
+SITE   = os.environ.get("FACECHECK_SITE", "https://facecheck.id")   # e.g. facecheck_stub.py
+STAGE  = "facecheck"
 
-    face_cfg = cfg.get("providers", {}).get("facecheck", {})
+TIMEOUT     = (5, 30)      # (connect, read) seconds per request
+POLL_TIMEOUT = (5, 10)     # status polls are small; don't sit on one for long
+POLL_MIN    = 0.5          # poll interval bounds, seconds
+POLL_MAX    = 5.0
+MAX_RETRIES = 5            # consecutive transport errors before giving up
 
-    token   = face_cfg.get("api_token", "").strip()
-    testing = bool(face_cfg.get("testing_mode", True))
+def error(msg):
+    events.emit("error", stage=STAGE, message=msg)
 
+def load_settings():
+    import config
+    token   = config.api_token(STAGE)
+    testing = config.get()["providers"]["facecheck"]["testing_mode"]
     if not token:
-        print("FACECHECK_ERROR API_TOKEN_MISSING")
+        error(f"API_TOKEN_MISSING (set {config.token_env(STAGE)} or save it in Settings)")
         sys.exit(1)
-
     return token, testing
 
-def main():
-    if len(sys.argv) < 2:
-        print("FACECHECK_ERROR need image path")
+def next_delay(delay, progress, last_progress):
+    """Poll quickly near the end of a search, back off while it stalls."""
+    if progress is None or progress <= last_progress:
+        return min(delay * 1.5, POLL_MAX)
+    if progress >= 90:
+        return POLL_MIN
+    return max(POLL_MIN, delay * 0.75)
+
+def post_json(session, url, timeout=TIMEOUT, **kw):
+    # in a helper thread, so Stop doesn't wait for a slow response (cancel.call)
+    r = cancel.call(session.post, url, timeout=timeout, **kw)
+    if r.status_code >= 500:
+        raise requests.HTTPError(f"HTTP {r.status_code}", response=r)
+    return r.json()
+
+def upload(session, site, image):
+    url = f"{site}/api/upload_pic"
+    if isinstance(image, (bytes, bytearray)):
+        return post_json(session, url, files={"images": ("capture.jpg", image, "image/jpeg"),
+                                              "id_search": None})
+    with open(image, "rb") as fh:
+        return post_json(session, url, files={"images": fh, "id_search": None})
+
+def search(image, api_token, testing_mode=True, site=None):
+    """`image` is the JPEG itself (bytes) or a path to it."""
+    site = site or SITE
+    if not (api_token or "").strip():
+        error("API_TOKEN_MISSING")
         return
 
-    image_path = sys.argv[1]
-    api_token, testing_mode = load_settings()
-    if "--test" in sys.argv:  # CLI flag overrides config
-        testing_mode = True
-
     if testing_mode:
         print("TESTING MODE ACTIVATED")
 
-    headers = {"accept": "application/json", "Authorization": api_token}
-    files   = {"images": open(image_path, "rb"), "id_search": None}
+    headers = {"accept": "application/json", "Authorization": api_token.strip()}
+    t0 = time.perf_counter()
 
-    # 1) upload
-    resp = requests.post(f"{SITE}/api/upload_pic", headers=headers, files=files).json()
-    if resp.get("error"):
-        print("FACECHECK_ERROR", resp["error"])
-        return
-
-    search_id = resp["id_search"]
-    payload = {"id_search": search_id, "with_progress": True,
-               "status_only": False, "demo": testing_mode}
+    # one keep-alive connection for the upload and every poll
+    with requests.Session() as session, cancel.resource("facecheck session", session.close):
+        session.headers.update(headers)
 
-    # 2) poll
-    while True:
-        r = requests.post(f"{SITE}/api/search", headers=headers, json=payload).json()
-        if r.get("error"):
-            print("FACECHECK_ERROR", r["error"])
+        # 1) upload
+        try:
+            with metrics.span("upload", stage=STAGE):
+                resp = upload(session, site, image)
+        except (OSError, ValueError, requests.RequestException) as e:
+            error(f"upload failed: {e}")
             return
-        if r["output"]:
-            break
-        print("FACECHECK_PROGRESS", r["progress"])
-        time.sleep(1)
+        if resp.get("error"):
+            error(resp["error"])
+            return
+
+        search_id = resp["id_search"]
+        payload = {"id_search": search_id, "with_progress": True,
+                   "status_only": False, "demo": testing_mode}
+
+        # 2) poll – interval follows reported progress, backs off on errors
+        polls, retries, delay, last = 0, 0, 1.0, -1
+        while True:
+            polls += 1
+            try:
+                with metrics.span("poll", stage=STAGE):
+                    r = post_json(session, f"{site}/api/search", timeout=POLL_TIMEOUT, json=payload)
+            except (ValueError, requests.RequestException) as e:
+                retries += 1
+                if retries >= MAX_RETRIES:
+                    error(f"search polling failed: {e}")
+                    return
+                cancel.sleep(min(POLL_MAX, POLL_MIN * 2 ** retries))
+                continue
+            retries = 0
+            if r.get("error"):
+                error(r["error"])
+                return
+            if r["output"]:
+                break
+            events.emit("progress", stage=STAGE, percent=r["progress"])
+            delay = next_delay(delay, r["progress"], last)
+            last  = r["progress"] if r["progress"] is not None else last
+            cancel.sleep(delay)              # returns early (raises) on cancel
+
+    print(f"search finished after {polls} polls in {time.perf_counter() - t0:.1f}s")
 
     # 3) matches
-    for itm in r["output"]["items"]:
-        print("FACECHECK_MATCH", itm["score"], itm["url"])
+    with metrics.span("parse", stage=STAGE):
+        for itm in r["output"]["items"]:
+            events.emit("match", stage=STAGE, score=itm["score"], url=itm["url"])
+
+def main():
+    if len(sys.argv) < 2:
+        error("need image path")
+        return
+
+    image_path = sys.argv[1]
+    api_token, testing_mode = load_settings()
+    if "--test" in sys.argv:  # CLI flag overrides config
+        testing_mode = True
 
-    print("FACECHECK_DONE")
+    search(image_path, api_token, testing_mode)
 
 if __name__ == "__main__":
     main()
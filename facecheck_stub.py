@@ -0,0 +1,116 @@
+# facecheck_stub.py  (offline stand-in for facecheck.id)
+"""
+Mimics the two endpoints facecheck_search.py uses, so the whole FaceCheck
+flow can be exercised and timed without touching the real service:
+
+    POST /api/upload_pic   multipart "images"  -> {"id_search": ..., "error": null}
+    POST /api/search       {"id_search": ...}  -> progress until done, then
+                                                  {"output": {"items": [...]}}
+
+Run it:
+    python facecheck_stub.py --port 8765 --duration 3 --matches 20
+    FACECHECK_SITE=http://127.0.0.1:8765 python facecheck_search.py img.jpg
+
+or from code:
+    server, url = facecheck_stub.serve()      # port 0 -> any free port
+    ...
+    server.shutdown()
+"""
+
+import json, time, random, argparse, threading, itertools
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, duration=3.0, matches=10, fail_rate=0.0):
+        super().__init__(addr, StubHandler)
+        self.duration  = duration       # seconds until a search completes
+        self.matches   = matches        # items returned per search
+        self.fail_rate = fail_rate      # share of /api/search answered with 500
+        self.searches  = {}             # id_search -> start time
+        self.ids       = itertools.count(1)
+        self.stats     = {"upload": 0, "search": 0, "failed": 0, "bytes_in": 0}
+        self.lock      = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive, like the real API
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def reply(self, code, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        srv  = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.headers.get("Authorization"):
+            return self.reply(200, {"error": "API_TOKEN_MISSING", "code": "NO_TOKEN"})
+
+        if self.path == "/api/upload_pic":
+            with srv.lock:
+                srv.stats["upload"] += 1
+                srv.stats["bytes_in"] += len(body)
+                sid = f"stub-{next(srv.ids)}"
+                srv.searches[sid] = time.monotonic()
+            return self.reply(200, {"id_search": sid, "message": "ok", "error": None})
+
+        if self.path == "/api/search":
+            try:
+                sid = json.loads(body or b"{}").get("id_search")
+            except ValueError:
+                sid = None
+            with srv.lock:
+                srv.stats["search"] += 1
+                started = srv.searches.get(sid)
+                if random.random() < srv.fail_rate:
+                    srv.stats["failed"] += 1
+                    started = "fail"
+            if started == "fail":
+                return self.reply(500, {"error": "stub: injected failure"})
+            if started is None:
+                return self.reply(200, {"error": "Invalid id_search", "code": "BAD_ID"})
+
+            progress = int(min(100, (time.monotonic() - started) / max(srv.duration, 1e-6) * 100))
+            if progress < 100:
+                return self.reply(200, {"output": None, "progress": progress,
+                                        "message": "searching", "error": None})
+            items = [{"score": 95 - i, "url": f"https://example.com/stub/{sid}/{i}", "base64": ""}
+                     for i in range(srv.matches)]
+            return self.reply(200, {"output": {"items": items}, "progress": 100,
+                                    "message": "done", "error": None})
+
+        self.reply(404, {"error": f"unknown endpoint {self.path}"})
+
+
+def serve(port=0, host="127.0.0.1", **opts):
+    """Start a stub in a background thread; returns (server, base_url)."""
+    server = StubServer((host, port), **opts)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--duration", type=float, default=3.0,
+                        help="seconds until a search reports its results")
+    parser.add_argument("--matches", type=int, default=10)
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="fraction of polls answered with HTTP 500")
+    args = parser.parse_args()
+    server = StubServer(("127.0.0.1", args.port), args.duration, args.matches, args.fail_rate)
+    print(f"FaceCheck stub on http://127.0.0.1:{args.port}  (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats))
@@ -0,0 +1,44 @@
+# image_opt.py  (pre-upload image optimisation)
+"""
+optimise(jpeg, max_side, quality) -> (jpeg, info)
+
+Decodes the capture, shrinks it so its longest side is at most `max_side`
+(never enlarges), and re-encodes it at `quality`.  cv2.imencode writes a
+bare JFIF file, so EXIF/XMP/ICC metadata from the source never reaches a
+provider; EXIF orientation is applied by imdecode before it is dropped.
+"""
+
+DEFAULTS = {
+    "pimeyes":   {"enabled": True, "max_side": 1600, "jpeg_quality": 90},
+    "facecheck": {"enabled": True, "max_side": 1024, "jpeg_quality": 85},
+}
+
+
+def optimise(jpeg: bytes, max_side: int, quality: int):
+    import cv2, numpy as np          # DEFAULTS is read by config.py at UI start-up
+    frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return jpeg, {"error": "cannot decode image, sent as is"}
+    h, w = frame.shape[:2]
+    scale = min(1.0, max_side / max(h, w)) if max_side else 1.0
+    try:
+        if scale < 1.0:                  # a 5000x2 strip must not become 1024x0
+            frame = cv2.resize(frame, (max(1, round(w * scale)), max(1, round(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    except cv2.error as e:
+        return jpeg, {"error": f"cannot optimise image ({str(e).strip().splitlines()[-1]}), sent as is"}
+    if not ok:
+        return jpeg, {"error": "re-encode failed, sent as is"}
+    out = buf.tobytes()
+    return out, {"before": len(jpeg), "after": len(out),
+                 "size_before": f"{w}x{h}", "size_after": f"{frame.shape[1]}x{frame.shape[0]}"}
+
+
+def describe(info: dict) -> str:
+    if "error" in info:
+        return f"upload image: {info['error']}"
+    pct = 100 * (1 - info["after"] / info["before"]) if info["before"] else 0
+    change = f"{abs(pct):.0f}% {'smaller' if pct >= 0 else 'larger'}"
+    return (f"upload image {info['size_before']} -> {info['size_after']}, "
+            f"{info['before']} -> {info['after']} bytes ({change}), metadata stripped")
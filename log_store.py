@@ -0,0 +1,152 @@
+# log_store.py  (run logs: index + retention)
+"""
+Every run still writes logs/log_<timestamp>.txt; the store adds
+
+    logs/index.json   one entry per run: file, started, providers,
+                      outcome, duration, redacted
+    retention         runs older than max_age_days, beyond max_runs or
+                      past max_mb in total are deleted (oldest first);
+                      runs older than redact_after_days have every URL
+                      (i.e. the match data) blanked out of their log.
+
+read_page() lets a viewer load a big log a slice at a time.
+"""
+
+import os, re, json, time, datetime
+
+LOG_DIR    = "logs"
+INDEX_FILE = "index.json"
+URL_RE     = re.compile(r"https?://\S+")
+PAGE_BYTES = 256 * 1024
+
+NAME_TS_RE = re.compile(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.txt$")   # log[_output]_<ts>.txt
+
+DEFAULTS = {"max_runs": 200, "max_mb": 50.0, "max_age_days": 30, "redact_after_days": 7}
+
+
+class LogStore:
+    def __init__(self, directory=LOG_DIR, max_runs=200, max_mb=50,
+                 max_age_days=30, redact_after_days=7):
+        self.dir        = directory
+        self.max_runs   = max_runs
+        self.max_bytes  = int(max_mb * 1024 * 1024)
+        self.max_age    = max_age_days * 86400
+        self.redact_age = redact_after_days * 86400
+        os.makedirs(self.dir, exist_ok=True)
+
+    # ---------- index ----------
+    @property
+    def index_path(self):
+        return os.path.join(self.dir, INDEX_FILE)
+
+    def runs(self) -> list:
+        """Indexed runs, newest first."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                runs = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            runs = []
+        return sorted(runs, key=lambda r: r.get("started", 0), reverse=True)
+
+    def _save(self, runs):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(runs, f, indent=1)
+        os.replace(tmp, self.index_path)
+
+    # ---------- runs ----------
+    def new_log(self, ts: str) -> str:
+        return os.path.join(self.dir, f"log_{ts}.txt")
+
+    def record(self, path, started, providers, outcome, duration):
+        runs = [r for r in self.runs() if r.get("file") != os.path.basename(path)]
+        runs.append({
+            "file":      os.path.basename(path),
+            "started":   started,
+            "providers": providers,
+            "outcome":   outcome,
+            "duration":  round(duration, 2),
+            "redacted":  False,
+        })
+        self._save(runs)
+        self.apply_retention()
+
+    # ---------- retention ----------
+    def apply_retention(self, now=None):
+        now  = now or time.time()
+        runs = {r["file"]: r for r in self.runs()}
+
+        # every log file counts; ones written before the index existed are adopted
+        files = []
+        for n in os.listdir(self.dir):
+            if n.startswith("log") and n.endswith(".txt"):
+                try:
+                    st = os.stat(os.path.join(self.dir, n))
+                except OSError:
+                    continue
+                run = runs.setdefault(n, {"file": n, "started": started_from_name(n, st.st_mtime),
+                                          "providers": [],
+                                          "outcome": "unknown", "duration": None,
+                                          "redacted": False})
+                files.append((run["started"], st.st_size, n))
+        files.sort(reverse=True)                     # newest first
+
+        keep, total = set(), 0
+        for i, (started, size, n) in enumerate(files):
+            expired = now - started > self.max_age or i >= self.max_runs \
+                      or total + size > self.max_bytes
+            if expired and i > 0:                    # never drop the newest run
+                self._remove(os.path.join(self.dir, n))
+                continue
+            total += size
+            keep.add(n)
+            if now - started > self.redact_age and not runs[n]["redacted"]:
+                self.redact(n)
+                runs[n]["redacted"] = True
+
+        self._save([r for n, r in runs.items() if n in keep])
+
+    def redact(self, name):
+        path = os.path.join(self.dir, name)
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(URL_RE.sub("[redacted]", text))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def started_from_name(name, fallback):
+    """Run start from a log_<timestamp>.txt name (mtime changes on checkout/copy)."""
+    m = NAME_TS_RE.search(name)
+    try:
+        return datetime.datetime.strptime(m.group(1), "%Y-%m-%d_%H-%M-%S").timestamp()
+    except (AttributeError, ValueError):
+        return fallback
+
+
+def read_page(path, offset=0, size=PAGE_BYTES):
+    """
+    Read about `size` bytes of a log starting at byte `offset`, ending on a
+    line break.  Returns (text, next_offset, eof).
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        chunk = f.read(size)
+        eof = len(chunk) < size
+        if not eof:
+            cut = chunk.rfind(b"\n")
+            if cut >= 0:
+                chunk = chunk[:cut + 1]
+            eof = f.seek(0, os.SEEK_END) <= offset + len(chunk)
+    return chunk.decode("utf-8", errors="replace"), offset + len(chunk), eof
@@ -1,4 +1,4 @@
-import sys, os, time, random
+import sys, os, random
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -6,10 +6,17 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium import webdriver
 from selenium.webdriver.common.action_chains import ActionChains
 
-URL = "https://pimeyes.com/en"
+import events, metrics, cancel
+
+URL   = "https://pimeyes.com/en"
+STAGE = "pimeyes"
+
+def error(msg):
+    cancel.check()          # after a cancel, failures are just the browser going away
+    events.emit("error", stage=STAGE, message=msg)
 
 def human_like_delay(min_time=1.5, max_time=3.5):
-    time.sleep(random.uniform(min_time, max_time))
+    cancel.sleep(random.uniform(min_time, max_time))
 
 def move_mouse_and_click(driver, element):
     """Moves the mouse to the element before clicking to mimic human interaction."""
@@ -24,7 +31,7 @@ def upload(url, image_path):
 
     # Check if file exists
     if not os.path.isfile(image_path):
-        print(f"Error: File not found at '{image_path}'. Please check the path and try again.")
+        error(f"File not found at '{image_path}'. Please check the path and try again.")
         return
     else:
         print(f"Image found: {image_path}")
@@ -37,6 +44,8 @@ def upload(url, image_path):
         chrome_options.add_experimental_option('useAutomationExtension', False)
 
         driver = webdriver.Chrome(options=chrome_options)
+        release = cancel.register("chrome", driver.quit)   # a cancel closes the browser at once
+        cancel.check()
         driver.get(url)
 
         # Ensure the page is fully loaded
@@ -55,7 +64,7 @@ def upload(url, image_path):
             move_mouse_and_click(driver, accept_button)
             print("Cookies accepted!")
             human_like_delay(2, 4)
-        except:
+        except Exception:
             print("No cookie popup detected. Continuing...")
 
         # Click the "Upload Photos" button first
@@ -66,8 +75,8 @@ def upload(url, image_path):
             )
             move_mouse_and_click(driver, upload_button)
             print("'Upload Photos' button clicked!")
-        except:
-            print("'Upload Photos' button not found.")
+        except Exception:
+            error("'Upload Photos' button not found.")
             driver.quit()
             return
 
@@ -80,10 +89,11 @@ def upload(url, image_path):
                 EC.presence_of_element_located((By.ID, "file-input"))
             )
             print("File input found! Uploading image...")
-            file_input.send_keys(image_path)
+            with metrics.span("upload", stage=STAGE):
+                file_input.send_keys(image_path)
             print("Image uploaded successfully!")
-        except:
-            print("File input field not found.")
+        except Exception:
+            error("File input field not found.")
             driver.quit()
             return
 
@@ -108,11 +118,11 @@ def upload(url, image_path):
                     human_like_delay(2, 4)
                     print(f"Checkbox {index + 1} ticked!")
             else:
-                print(f"⚠ Expected 3 checkboxes, but found {len(checkboxes)}.")
+                error(f"Expected 3 checkboxes, but found {len(checkboxes)}.")
                 driver.quit()
                 return
-        except:
-            print("Checkboxes not found.")
+        except Exception:
+            error("Checkboxes not found.")
             driver.quit()
             return
 
@@ -130,8 +140,8 @@ def upload(url, image_path):
             move_mouse_and_click(driver, start_search_button)
             print("Search started successfully!")
 
-        except:
-            print("'Start Search' button not found.")
+        except Exception:
+            error("'Start Search' button not found.")
             driver.quit()
             return
 
@@ -139,14 +149,15 @@ def upload(url, image_path):
 
         # Capture results page URL
         search_results_url = driver.current_url
-        print("Search Results URL:", search_results_url)
+        events.emit("result_url", stage=STAGE, url=search_results_url)
 
     except Exception as e:
-        print(f"❌ An error occurred: {e}")
+        error(f"An error occurred: {e}")
 
     finally:
         if driver:
-            driver.quit()
+            if cancel.unregister(release):  # otherwise cancel.request()/register() quit it
+                driver.quit()
 
 def main():
     # NEW: allow  path via CLI   ->  python main.py <image_path>
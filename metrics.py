@@ -0,0 +1,40 @@
+# metrics.py  (timing spans)
+"""
+    with metrics.span("upload", stage="facecheck"):
+        ...
+
+prints a "metric" event ({"name": "upload", "stage": "facecheck", "ms": 812.4})
+when the block ends, so spans travel the same way as every other event:
+into the run log, to the UI and, in-process, into the stage's record.
+summarize() folds a run's metric events into the end-of-run summary
+(rendered by events.format_spans).
+"""
+
+import time, contextlib
+
+import events
+
+
+@contextlib.contextmanager
+def span(name: str, stage: str | None = None, **fields):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = round((time.perf_counter() - t0) * 1000, 1)
+        extra = {"stage": stage} if stage else {}
+        events.emit("metric", name=name, ms=ms, **extra, **fields)
+
+
+def summarize(evts) -> dict:
+    """{"stage.name": {"count", "total_ms", "max_ms"}} over the metric events."""
+    out = {}
+    for e in evts:
+        if e.get("type") != "metric":
+            continue
+        key = f"{e['stage']}.{e['name']}" if e.get("stage") else e["name"]
+        s = out.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        s["count"]    += 1
+        s["total_ms"]  = round(s["total_ms"] + e.get("ms", 0), 1)
+        s["max_ms"]    = max(s["max_ms"], e.get("ms", 0))
+    return out
@@ -0,0 +1,128 @@
+# result_cache.py  (encrypted provider result cache)
+"""
+Remembers what each provider returned for an image so a repeat search of
+the same picture is answered locally, without another upload.
+
+    key    sha256(provider + provider settings + image bytes)
+    value  the provider's result events (match / result_url), Fernet
+           encrypted; Fernet's timestamp doubles as the TTL check
+    size   oldest entries are evicted once the cache exceeds max_bytes
+
+The encryption key comes from $CCTP_CACHE_KEY or a per-user key file kept
+outside the cache directory; purge() deletes the entries *and* that key
+file, so anything missed on disk can no longer be read.
+"""
+
+import os, json, time, hashlib
+from cryptography.fernet import Fernet, InvalidToken
+
+CACHE_DIR = "cache"
+KEY_FILE  = os.path.join(os.path.expanduser("~"), ".cctp_cache.key")
+SECRET_FIELDS = ("api_token",)          # never part of the key
+
+
+def make_key(provider: str, settings: dict, image: bytes) -> str:
+    public = {k: v for k, v in settings.items() if k not in SECRET_FIELDS}
+    h = hashlib.sha256()
+    h.update(provider.encode())
+    h.update(json.dumps(public, sort_keys=True).encode())
+    h.update(image)
+    return h.hexdigest()
+
+
+def _load_key() -> bytes:
+    env = os.environ.get("CCTP_CACHE_KEY")
+    if env:
+        return env.encode()
+    if os.path.exists(KEY_FILE):
+        with open(KEY_FILE, "rb") as f:
+            return f.read().strip()
+    key = Fernet.generate_key()
+    fd  = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+class ResultCache:
+    def __init__(self, ttl_hours=24.0, max_mb=20.0, directory=CACHE_DIR):
+        self.ttl       = int(ttl_hours * 3600)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.dir       = directory
+        self._fernet   = None
+
+    @property
+    def fernet(self) -> Fernet:
+        if self._fernet is None:
+            self._fernet = Fernet(_load_key())
+        return self._fernet
+
+    def _path(self, key):
+        return os.path.join(self.dir, f"{key}.bin")
+
+    def get(self, key: str):
+        """Cached events for `key`, or None (missing, expired or unreadable)."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            return None
+        try:
+            events = json.loads(self.fernet.decrypt(blob, ttl=self.ttl))
+        except (InvalidToken, ValueError):
+            self._remove(path)              # expired or written with an old key
+            return None
+        os.utime(path)                      # LRU: a hit counts as a use
+        return events
+
+    def put(self, key: str, events: list):
+        os.makedirs(self.dir, exist_ok=True)
+        blob = self.fernet.encrypt(json.dumps(events).encode())
+        tmp  = self._path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used beyond max_bytes."""
+        try:
+            names = [n for n in os.listdir(self.dir) if n.endswith(".bin")]
+        except OSError:
+            return
+        now, entries = time.time(), []
+        for n in names:
+            p = os.path.join(self.dir, n)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            if now - st.st_mtime > self.ttl:
+                self._remove(p)
+            else:
+                entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(p); total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def purge(directory=CACHE_DIR) -> int:
+    """Delete every cached entry and the encryption key; returns entries removed."""
+    removed = 0
+    if os.path.isdir(directory):
+        for n in os.listdir(directory):
+            if n.endswith((".bin", ".tmp")):
+                ResultCache._remove(os.path.join(directory, n)); removed += 1
+    if not os.environ.get("CCTP_CACHE_KEY"):
+        ResultCache._remove(KEY_FILE)
+    return removed
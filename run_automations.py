@@ -1,133 +1,190 @@
 #!/usr/bin/env python
-import sys, subprocess, os, datetime, time, json
+import sys, os, datetime, time, argparse, base64, tempfile, contextlib
+
+from stages import StageRunner, EventLines, current_sink
+import config, log_store, metrics, cancel
 
 # ---------- paths / constants ----------
-CONFIG_FILE = "config.json"
 SRC_DIR     = "Source_Images"
-IMG_PATH    = os.path.join(SRC_DIR, "Webcam_Capture.jpg")
+IMG_PATH    = os.path.join(SRC_DIR, "Webcam_Capture.jpg")   # subprocess capture only
 
-TAKE_PIC    = "takePicture.py"
-PIMEYES     = "main.py"
-FACECHECK   = "facecheck_search.py"
+PIMEYES_URL = "https://pimeyes.com/en"
+CACHED_TYPES = ("match", "result_url")
 
 LOG_DIR     = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-
-TS        = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-LOG_FILE  = os.path.join(LOG_DIR, f"log_{TS}.txt")
-
-sys.stdout.reconfigure(encoding="utf-8", errors="replace")
-
 
 # ---------- helpers ----------
-def load_cfg() -> dict:
-    default = {
-        "webcam_index": 0,
-        "providers": {
-            "pimeyes":   { "enabled": True },
-            "facecheck": { "enabled": True, "testing_mode": True }
-        }
-    }
-    if not os.path.exists(CONFIG_FILE):
-        return default
+@contextlib.contextmanager
+def temp_image(data: bytes):
+    """Short-lived file for providers that need a path; always removed, by a
+    cancel too (the UI may os._exit before this finally runs)."""
+    fd, path = tempfile.mkstemp(prefix="cctp_", suffix=".jpg")
+    def remove():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
     try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            cfg = json.load(f)
-    except json.JSONDecodeError:
-        print("Config corrupted, using defaults.")
-        return default
-
-    # merge shallow
-    cfg.setdefault("webcam_index", default["webcam_index"])
-    cfg.setdefault("providers",   default["providers"])
-    for k, v in default["providers"].items():
-        cfg["providers"].setdefault(k, v)
-    return cfg
-
-
-def run(cmd, log_f):
-    proc = subprocess.Popen(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-        text=True, encoding="utf-8", bufsize=1
-    )
-    for line in proc.stdout:
-        print(line, end="")
-        log_f.write(line)
-    proc.wait()
-    return proc.returncode
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with cancel.resource("temp image", remove):
+            yield path
+    finally:
+        remove()
 
 
-# ---------- main pipeline ----------
-def main():
-    cfg       = load_cfg()
-    prov      = cfg["providers"]
-    cam_idx   = cfg["webcam_index"]
-
-    with open(LOG_FILE, "w", encoding="utf-8") as log:
-        log.write(f"==== run {TS} ====\n")
-
-        # STEP 1 – capture
-        log.write("[1] takePicture.py …\n")
-        if run([sys.executable, TAKE_PIC, "-i", str(cam_idx)], log) != 0 \
-           or not os.path.exists(IMG_PATH):
-            log.write("ERROR: capture failed.\n"); return
-
-        print("SNAP_COMPLETE", flush=True)
-        log.write("SNAP_COMPLETE\n"); log.flush()
-        time.sleep(2)          # give UI time to load preview
-
-        step = 2
-
-        # STEP 2 – PimEyes
-        if prov["pimeyes"]["enabled"]:
-            log.write(f"[{step}] {PIMEYES} …\n")
-            run([sys.executable, PIMEYES, IMG_PATH], log)
-            step += 1
-        else:
-            log.write("PimEyes disabled in config.\n")
-
-        # STEP 3 – FaceCheck
-        if prov["facecheck"]["enabled"]:
-            cmd = [sys.executable, FACECHECK, IMG_PATH]
-            if prov["facecheck"].get("testing_mode", True):
-                cmd.append("--test")
-            log.write(f"[{step}] {FACECHECK} …\n")
-            run(cmd, log)
-        else:
-            log.write("FaceCheck disabled in config.\n")
-
-        log.write("==== finished ====\n")
-
-    print(f"\nLog saved to {LOG_FILE}")
-
-    def closeEvent(self, event):
-    # 1. stop animation
-        if self.timer.isActive():
-            self.timer.stop()
-
-    # 2. release Pixmap → unlock file
-        self.image_label.clear()
-        QApplication.processEvents()          # force UI repaint
-
-    # 3. terminate subprocess group
+def read_capture_file() -> bytes | None:
+    """Subprocess capture writes IMG_PATH; read it back and delete it."""
     try:
-        if hasattr(self, "thread") and self.thread.isRunning():
-            self.thread.stop()
-            self.thread.wait(5000)        # up to 5 s
-    except Exception:
-        pass
-
-    # 4. delete captured JPG (retry a couple of times)
-    img = os.path.abspath(os.path.join("Source_Images", "Webcam_Capture.jpg"))
-    for _ in range(5):
+        with open(IMG_PATH, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+    finally:
         try:
-            if os.path.exists(img):
-                os.remove(img)
-            break
-        except PermissionError:
-            import time; time.sleep(0.5)
+            os.remove(IMG_PATH)
+        except OSError:
+            pass
+
+
+def prepare_upload(name: str, settings: dict, image: bytes, log_f, record=None) -> bytes:
+    """Shrink/re-encode the capture to what `name` needs; logs bytes before/after."""
+    import image_opt
+    opts = {**image_opt.DEFAULTS.get(name, {}), **settings.get("upload", {})}
+    if not opts.get("enabled", True):
+        return image
+    stream = EventLines(current_sink(), log_f, name, record)
+    t0 = time.perf_counter()
+    data, info = image_opt.optimise(image, opts.get("max_side"), opts.get("jpeg_quality", 90))
+    stream.emit("metric", name="optimise", ms=round((time.perf_counter() - t0) * 1000, 1),
+                bytes_before=len(image), bytes_after=len(data))
+    print(image_opt.describe(info), file=stream)
+    return data
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subprocess", action="store_true",
+                        help="run every stage in its own interpreter (isolation fallback)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore cached results and always submit to the providers")
+    return parser.parse_args(argv)
+
 
-    event.accept()
+# ---------- main pipeline ----------
+def main(argv=None):
+    args      = parse_args(argv)
+    cfg       = config.get()
+    mode      = "subprocess" if args.subprocess else cfg["stage_mode"]
+    stages    = StageRunner(mode)
+
+    ts        = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    store     = log_store.LogStore(LOG_DIR, **{k: cfg["logs"][k] for k in log_store.DEFAULTS})
+    log_file  = store.new_log(ts)
+    started   = time.time()
+    summary   = {"providers": [], "outcome": "capture_failed"}
+
+    try:
+        return _pipeline(args, cfg, stages, mode, ts, log_file, summary)
+    except KeyboardInterrupt:                      # Ctrl+C: stop the stage threads too
+        cancel.request()                           # (run_parallel already waited for them)
+        summary["outcome"] = "cancelled"
+        print(f"interrupted – released {', '.join(cancel.released()) or 'nothing'}",
+              file=sys.stderr)
+        return 130
+    finally:
+        store.record(log_file, started, summary["providers"], summary["outcome"],
+                     time.time() - started)
+
+
+def _pipeline(args, cfg, stages, mode, ts, log_file, summary):
+    """The run itself; fills in summary["providers"] / summary["outcome"] for the index."""
+    prov   = cfg["providers"]
+    source = cfg["camera_source"] or cfg["webcam_index"]
+
+    t0 = time.perf_counter()
+    seen = []                                      # every event of the run, for the summary
+    with open(log_file, "w", encoding="utf-8") as log:
+        run = EventLines(current_sink(), log, record=seen)      # run-level events
+        run.note(f"==== run {ts} ({mode}) ====")
+
+        # STEP 1 – capture (JPEG bytes, in memory)
+        run.note("[1] capture …")
+        cam_argv = ["--source", source] if isinstance(source, str) else ["-i", str(source)]
+        rc, image = stages.run("capture", [source], cam_argv, log, seen)
+        if mode == "subprocess" and rc == 0:
+            image = read_capture_file()
+        if cancel.requested():
+            summary["outcome"] = "cancelled"
+            run.emit("done", log=log_file, cancelled=True)
+            return 130
+        if rc != 0 or not image:
+            run.emit("error", message="capture failed")
+            run.emit("done", log=log_file)
+            return 1
+
+        run.emit("snap_complete", jpeg=base64.b64encode(image).decode("ascii"))
+        summary["outcome"] = "incomplete"
+
+        # STEP 2 – providers, run side by side on the same capture
+        wanted = [p for p in ("pimeyes", "facecheck") if prov[p]["enabled"]]
+        for p in ("pimeyes", "facecheck"):
+            if p not in wanted:
+                run.note(f"{p} disabled in config.")
+        summary["providers"] = list(wanted)
+
+        # answer repeat searches of the same image from the local cache
+        cache, keys = None, {}
+        records = {name: [] for name in wanted}
+        if cfg["cache"]["enabled"] and not args.no_cache and wanted:
+            import result_cache
+            cache = result_cache.ResultCache(cfg["cache"]["ttl_hours"], cfg["cache"]["max_mb"])
+            for name in list(wanted):
+                keys[name] = result_cache.make_key(name, prov[name], image)
+                hit = cache.get(keys[name])
+                if hit is None:
+                    continue
+                wanted.remove(name)
+                replay = EventLines(current_sink(), log, name)
+                replay.note("cache hit – not submitted")
+                for evt in hit:
+                    replay.put({**evt, "cached": True})
+                replay.emit("done", rc=0, seconds=0.0, cached=True)
+
+        # resize / re-encode per provider; Selenium (and any subprocess
+        # stage) gets its copy as a short-lived file
+        with contextlib.ExitStack() as files:
+            jobs = {}
+            for name in wanted:
+                data = prepare_upload(name, prov[name], image, log, records[name])
+                path = None
+                if name == "pimeyes" or mode == "subprocess":
+                    path = files.enter_context(temp_image(data))
+                if name == "pimeyes":
+                    jobs[name] = ([PIMEYES_URL, path], [path])
+                else:
+                    testing = prov["facecheck"]["testing_mode"]
+                    argv    = [path] + (["--test"] if testing else [])
+                    jobs[name] = ([data, config.api_token("facecheck"), testing], argv)
+
+            if jobs:
+                run.note(f"[2] {' + '.join(jobs)} (parallel) …")
+                results = stages.run_parallel(jobs, log, records)
+                for name, (rc, _) in results.items():
+                    evts = records.get(name, [])
+                    if cache and rc == 0 and not any(e["type"] == "error" for e in evts):
+                        cache.put(keys[name], [e for e in evts if e["type"] in CACHED_TYPES])
+
+        failed = any(e["type"] == "error" for evts in records.values() for e in evts)
+        summary["outcome"] = "cancelled" if cancel.requested() else "errors" if failed else "ok"
+
+        run.emit("metric", name="total", ms=round((time.perf_counter() - t0) * 1000, 1))
+        run.emit("summary", spans=metrics.summarize(seen + [e for evts in records.values()
+                                                            for e in evts]))
+        run.emit("done", log=log_file, **({"cancelled": True} if cancel.requested() else {}))
+
+    return 130 if cancel.requested() else 0
 
 if __name__ == "__main__":
-    main()
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    sys.exit(main())
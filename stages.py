@@ -0,0 +1,253 @@
+# stages.py  (stage engine used by run_automations.py)
+"""
+Runs the pipeline stages either in-process or as child interpreters.
+
+    inprocess   – each stage module (takePicture, main, facecheck_search) is
+                  imported once per interpreter and its entry point called
+                  directly; stdout is routed per thread so output still lands
+                  on the console / UI and in the run log.
+    subprocess  – the old behaviour: one `python <script>` per stage, kept as
+                  an isolation fallback.
+"""
+
+import sys, os, io, time, threading, importlib
+
+import events, cancel
+
+MODES = ("inprocess", "subprocess")
+STOP_GRACE = 1.0       # seconds stages get to wind down after Ctrl+C
+HERE  = os.path.dirname(os.path.abspath(__file__))     # stage scripts live next to this file
+
+# name -> (module / script stem, entry point)
+STAGES = {
+    "capture":   ("takePicture",      "capture_jpeg"),
+    "pimeyes":   ("main",             "upload"),
+    "facecheck": ("facecheck_search", "search"),
+}
+
+_modules = {}
+_modules_lock = threading.Lock()
+
+
+# ---------- stdout routing ----------
+class _Router(io.TextIOBase):
+    """sys.stdout replacement: writes go to the current thread's sink."""
+
+    def __init__(self, default):
+        self.default = default
+        self.local   = threading.local()
+
+    def _target(self):
+        return getattr(self.local, "sink", None) or self.default
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        self._target().flush()
+
+    @property
+    def encoding(self):
+        return getattr(self.default, "encoding", "utf-8")
+
+
+class EventLines:
+    """
+    Line-buffered writer that turns stage output into events: each complete
+    line is decoded once (plain text becomes a "log" event), tagged with the
+    stage, then written as JSON to `out` and as rendered text to `log`.
+    Writes go out under a shared lock, so stages running in parallel never
+    interleave half-lines.
+    """
+    _lock = threading.Lock()
+
+    def __init__(self, out, log, stage=None, record=None):
+        self.out    = out
+        self.log    = log
+        self.stage  = stage
+        self.record = record            # optional list collecting every event
+        self.buf    = ""
+
+    def write(self, s):
+        self.buf += s
+        if "\n" in self.buf:
+            *lines, self.buf = self.buf.split("\n")
+            for line in lines:
+                self.put(events.decode(line))
+        return len(s)
+
+    def put(self, evt: dict):
+        if self.stage:
+            evt.setdefault("stage", self.stage)
+        if self.record is not None:
+            self.record.append(evt)
+        with EventLines._lock:
+            self.out.write(events.encode(evt) + "\n"); self.out.flush()
+            self.log.write(events.render(evt) + "\n"); self.log.flush()
+
+    def emit(self, type_: str, **fields):
+        self.put(events.make(type_, **fields))
+
+    def note(self, text: str):
+        """Log-file only line (headers, notes)."""
+        with EventLines._lock:
+            self.log.write((f"[{self.stage}] " if self.stage else "") + text + "\n")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.buf:
+            self.write("\n")
+
+
+def _router() -> _Router:
+    if not isinstance(sys.stdout, _Router):
+        # pythonw / frozen GUI builds have no console
+        sys.stdout = _Router(sys.stdout or open(os.devnull, "w", encoding="utf-8"))
+    return sys.stdout
+
+
+def current_sink():
+    """What print() in this thread currently writes to."""
+    return _router()._target()
+
+
+class route_stdout:
+    """Send print() output of the calling thread to `sink` until exit."""
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def __enter__(self):
+        r = _router()
+        self.prev = getattr(r.local, "sink", None)
+        r.local.sink = self.sink
+        return self.sink
+
+    def __exit__(self, *exc):
+        _router().local.sink = self.prev
+        return False
+
+
+# ---------- stage runners ----------
+def _load(module: str):
+    """Import a stage module once; returns (module, seconds spent importing)."""
+    with _modules_lock:
+        if module in _modules:
+            return _modules[module], 0.0
+        t0 = time.perf_counter()
+        mod = importlib.import_module(module)
+        _modules[module] = mod
+        return mod, time.perf_counter() - t0
+
+
+def _run_inprocess(name, args, stream):
+    module, func = STAGES[name]
+    with route_stdout(stream):
+        try:
+            mod, startup = _load(module)
+            stream.emit("metric", name="startup", ms=round(startup * 1000, 1), mode="inprocess")
+            result = getattr(mod, func)(*args)
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            return code, None
+        except cancel.Cancelled:
+            print(f"{name} cancelled")
+            return 130, None
+        except Exception as e:
+            import traceback
+            stream.emit("error", message=f"{name} stage crashed: {e}")
+            traceback.print_exc(file=sys.stdout)
+            return 1, None
+    return 0, result
+
+
+def _run_subprocess(name, argv, stream):
+    import subprocess
+    module, _ = STAGES[name]
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    if cancel.requested():
+        return 130
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, f"{module}.py"), *argv],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding="utf-8", bufsize=1, env=env
+    )
+    # a cancel kills the child; its stdout then hits EOF and we return
+    with cancel.resource(f"{name} process", proc.kill):
+        if cancel.requested():                 # cancelled while it was starting
+            proc.kill()
+        first = True
+        for line in proc.stdout:
+            if first:
+                stream.emit("metric", name="startup", ms=round((time.perf_counter() - t0) * 1000, 1),
+                            mode="subprocess")
+                first = False
+            stream.write(line)
+        proc.wait()
+    return 130 if cancel.requested() else proc.returncode
+
+
+class StageRunner:
+    """
+    run(name, args, argv, log_f, record=None) -> (returncode, result)
+
+    `args` are the entry-point arguments used in-process, `argv` the command
+    line for the same stage in subprocess mode.  `result` is the entry
+    point's return value (None in subprocess mode).  Stage output reaches
+    stdout as JSON events and the run log as text (see events.py), a whole
+    line at a time, so run() may be called from several threads at once.
+    If `record` is a list, the stage's events are appended to it as well.
+    """
+
+    def __init__(self, mode: str = "inprocess"):
+        if mode not in MODES:
+            raise ValueError(f"unknown stage mode {mode!r}")
+        self.mode = mode
+
+    def run(self, name, args, argv, log_f, record=None):
+        stream = EventLines(current_sink(), log_f, name, record)
+        try:
+            if self.mode == "subprocess":
+                return _run_subprocess(name, argv, stream), None
+            return _run_inprocess(name, args, stream)
+        finally:
+            stream.close()
+
+    def run_parallel(self, jobs: dict, log_f, records=None) -> dict:
+        """
+        jobs: {name: (args, argv)} – all stages start at once (one thread
+        each) and their events are passed on as they happen.  `records`
+        ({name: list}) optionally collects each stage's events.
+        Returns {name: (returncode, result)} once every stage has finished.
+        On Ctrl+C the stages are cancelled and given STOP_GRACE to log their
+        end before KeyboardInterrupt is passed on.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+        records = records or {}
+        sink = current_sink()          # worker threads inherit our stdout
+
+        def one(name, args, argv):
+            with route_stdout(sink):
+                t0 = time.perf_counter()
+                rc, result = self.run(name, args, argv, log_f, records.get(name))
+                EventLines(sink, log_f, name).emit(
+                    "done", rc=rc, seconds=round(time.perf_counter() - t0, 1))
+                return rc, result
+
+        pool = ThreadPoolExecutor(max_workers=max(1, len(jobs)))
+        futures = {n: pool.submit(one, n, *job) for n, job in jobs.items()}
+        try:
+            wait(futures.values())
+        except KeyboardInterrupt:
+            cancel.request()
+            wait(futures.values(), timeout=STOP_GRACE)
+            pool.shutdown(wait=False)
+            raise
+        pool.shutdown()
+        return {n: f.result() for n, f in futures.items()}
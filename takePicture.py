@@ -1,24 +1,64 @@
 # takePicture.py  (non-interactive)
+"""
+capture_jpeg(source) -> JPEG bytes, used in-process by run_automations.py;
+the frame is encoded once and never touches the disk.
+capture(source) -> path, the script entry point, writes Source_Images/.
+
+`source` is a webcam index or a fake-camera image/video file (see
+capture_service.py).  If the UI keeps a warm CaptureService on the same
+source, the frame is taken from it instead of opening the camera again.
+"""
 import cv2, os, time, argparse, sys
 
+import events, capture_service, metrics
+
 SAVE_DIR  = "Source_Images"
 SAVE_FILE = "Webcam_Capture.jpg"
-os.makedirs(SAVE_DIR, exist_ok=True)
+JPEG_QUALITY = 95
+
+def grab(source):
+    svc = capture_service.current(source)
+    if svc:
+        print(f"Capturing from warm {svc.desc or 'camera'} ...")
+        frame = svc.snapshot()
+    else:
+        cap, desc = capture_service.open_source(source)
+        if cap is None:
+            events.emit("error", stage="capture", message=desc)
+            return None
+        print(f"Capturing from {desc} ...")
+        try:
+            frame = capture_service.grab_ready(cap)   # waits for stable exposure
+        finally:
+            cap.release()
+    if frame is None:
+        events.emit("error", stage="capture", message="failed to grab frame")
+        return None
+    return frame
 
-def capture(index: int) -> str | None:
-    cap = cv2.VideoCapture(index, cv2.CAP_DSHOW)
-    if not cap.isOpened():
-        print(f"ERROR: cannot open webcam {index}")
+def capture_jpeg(source) -> bytes | None:
+    t0 = time.perf_counter()
+    with metrics.span("capture", stage="capture"):
+        frame = grab(source)
+    if frame is None:
         return None
-    print(f"Capturing from webcam {index} ...")
-    time.sleep(1)                                 # warm-up
-    ok, frame = cap.read()
-    cap.release()
+    with metrics.span("encode", stage="capture"):
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
     if not ok:
-        print("ERROR: failed to grab frame")
+        events.emit("error", stage="capture", message="failed to encode frame")
+        return None
+    print(f"Captured {frame.shape[1]}x{frame.shape[0]} frame ({len(buf)} bytes, in memory) "
+          f"in {time.perf_counter() - t0:.2f}s")
+    return buf.tobytes()
+
+def capture(source) -> str | None:
+    data = capture_jpeg(source)
+    if data is None:
         return None
+    os.makedirs(SAVE_DIR, exist_ok=True)
     path = os.path.join(SAVE_DIR, SAVE_FILE)
-    cv2.imwrite(path, frame)
+    with open(path, "wb") as f:
+        f.write(data)
     print(f"Saved {path}")
     return path
 
@@ -26,6 +66,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-i", "--index", type=int, default=0,
                         help="webcam index (default 0)")
+    parser.add_argument("--source", default=None,
+                        help="fake camera: image or video file used instead of a webcam")
     args = parser.parse_args()
-    result = capture(args.index)
+    result = capture(args.source or args.index)
     sys.exit(0 if result else 1)
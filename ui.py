@@ -1,19 +1,29 @@
-import sys, os, json, subprocess, datetime, psutil
+import time
+T_START = time.perf_counter()       # "first paint" is measured from here
+
+import sys, os, datetime, base64
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QPushButton, QLabel, QTextEdit, QFileDialog,
-    QVBoxLayout, QMessageBox, QDialog, QSpinBox, QLineEdit, QCheckBox, QFormLayout, QHBoxLayout
+    QApplication, QWidget, QPushButton, QLabel, QTextEdit, QPlainTextEdit, QListView, QFileDialog,
+    QVBoxLayout, QMessageBox, QDialog, QSpinBox, QLineEdit, QCheckBox, QFormLayout, QHBoxLayout,
+    QListWidget, QListWidgetItem, QSplitter
 )
-from PyQt6.QtGui import QPixmap, QFont
-from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer
+from PyQt6.QtGui import QPixmap, QImage, QImageReader, QFont, QStandardItemModel, QStandardItem, QDesktopServices
+from PyQt6.QtCore import (QThread, pyqtSignal, Qt, QTimer, QUrl, QSize, QBuffer, QByteArray, QIODevice,
+                          QFileSystemWatcher)
+
+import config, events, log_store, metrics, cancel
 
 RUN_SCRIPT   = "run_automations.py"
-CONFIG_FILE  = "config.json"
 LOG_DIR      = "logs"
-IMAGE_PATH   = os.path.join("Source_Images", "Webcam_Capture.jpg")
+PROVIDER_NAMES = {"pimeyes": "PimEyes", "facecheck": "FaceCheck"}
+PREVIEW_SIZE = QSize(512, 384)
+SHUTDOWN_LIMIT = 0.5            # seconds Stop / close may take to release everything
+EXIT_GRACE     = 1.0            # then at most this long for a stuck run before os._exit
 
 class ConfigDialog(QDialog):
     def __init__(self, cfg: dict, parent=None):
         super().__init__(parent)
+        token, source = config.token_source("facecheck")
         self.setWindowTitle("Settings")
 
         # ---------- provider switches ----------
@@ -27,11 +37,22 @@ class ConfigDialog(QDialog):
         # ---------- existing fields -------------
         self.spin_cam   = QSpinBox(); self.spin_cam.setRange(0, 9)
         self.line_token = QLineEdit(); self.line_token.setMinimumWidth(260)
+        self.line_token.setEchoMode(QLineEdit.EchoMode.PasswordEchoOnEdit)
         self.chk_test   = QCheckBox("Use FaceCheck testing mode (free / slow)")
+        self.chk_warm   = QCheckBox("Keep webcam open while the UI runs (faster capture)")
 
         self.spin_cam.setValue(cfg.get("webcam_index", 0))
-        self.line_token.setText(prov.get("facecheck", {}).get("api_token", ""))
+        self.token = token
+        self.line_token.setText(token)
+        if source == "environment":             # env override wins; nothing to edit here
+            self.line_token.setEnabled(False)
+            self.line_token.setToolTip(f"Set by {config.token_env('facecheck')}")
+        elif source == "secrets file":
+            self.line_token.setToolTip(f"Stored in {config.PLAINTEXT_NOTE}")
+        elif source:
+            self.line_token.setToolTip(f"Stored in the {source}, not in config.json")
         self.chk_test.setChecked(prov.get("facecheck", {}).get("testing_mode", True))
+        self.chk_warm.setChecked(cfg.get("warm_camera", False))
 
         # ---------- layout ----------
         form = QFormLayout()
@@ -39,6 +60,7 @@ class ConfigDialog(QDialog):
         form.addRow(self.chk_facechk)
 
         form.addRow("Webcam index:", self.spin_cam)
+        form.addRow("", self.chk_warm)
         form.addRow("FaceCheck API token:", self.line_token)
         form.addRow("", self.chk_test)
 
@@ -52,26 +74,197 @@ class ConfigDialog(QDialog):
     def values(self):
         return {
             "webcam_index": self.spin_cam.value(),
+            "warm_camera":  self.chk_warm.isChecked(),
             "providers": {
                 "pimeyes":  { "enabled": self.chk_pimeyes.isChecked() },
                 "facecheck": {
                     "enabled":     self.chk_facechk.isChecked(),
-                    "api_token":   self.line_token.text().strip(),
                     "testing_mode": self.chk_test.isChecked()
                 }
             }
         }
 
+    def new_token(self):
+        """The edited API token, or None if unchanged / set by the environment."""
+        text = self.line_token.text().strip()
+        return text if self.line_token.isEnabled() and text != self.token else None
+
+class PageReader(QThread):
+    """Reads one page of a log file off the GUI thread."""
+    page = pyqtSignal(int, str, int, bool)          # generation, text, next offset, eof
+
+    def __init__(self, gen, path, offset):
+        super().__init__()
+        self.gen, self.path, self.offset = gen, path, offset
+
+    def run(self):
+        try:
+            text, nxt, eof = log_store.read_page(self.path, self.offset)
+        except OSError as e:
+            text, nxt, eof = f"Cannot read log: {e}", self.offset, True
+        self.page.emit(self.gen, text, nxt, eof)
+
+class LogViewer(QDialog):
+    """Run index on the left; the chosen log is paged in as you scroll."""
+
+    def __init__(self, store: log_store.LogStore, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Run logs")
+        self.resize(1000, 650)
+        self.store  = store
+        self.gen    = 0
+        self.path   = None
+        self.offset = 0
+        self.eof    = True
+        self.reader = None
+        self.loading = False
+
+        self.runs = QListWidget()
+        for r in store.runs():
+            when = datetime.datetime.fromtimestamp(r.get("started", 0)).strftime("%Y-%m-%d %H:%M:%S")
+            dur  = "" if r.get("duration") is None else f"{r['duration']:.1f}s"
+            text = f"{when}  {r.get('outcome', '?'):<14} {dur:>7}  {', '.join(r.get('providers', []))}"
+            item = QListWidgetItem(text + ("  [redacted]" if r.get("redacted") else ""))
+            item.setData(Qt.ItemDataRole.UserRole, os.path.join(store.dir, r["file"]))
+            self.runs.addItem(item)
+        self.runs.currentItemChanged.connect(
+            lambda cur, _prev: cur and self.open_log(cur.data(Qt.ItemDataRole.UserRole)))
+
+        self.text = QPlainTextEdit(readOnly=True)
+        self.text.verticalScrollBar().valueChanged.connect(self.maybe_load_more)
+
+        btn_file = QPushButton("Open other file…")
+        btn_file.clicked.connect(self.pick_file)
+
+        split = QSplitter(); split.addWidget(self.runs); split.addWidget(self.text)
+        split.setSizes([380, 620])
+        lay = QVBoxLayout(self); lay.addWidget(split); lay.addWidget(btn_file)
+
+        if self.runs.count():
+            self.runs.setCurrentRow(0)
+
+    def pick_file(self):
+        file, _ = QFileDialog.getOpenFileName(self, "Select log", self.store.dir, "Text Files (*.txt)")
+        if file:
+            self.open_log(file)
+
+    def open_log(self, path):
+        self.gen += 1                  # pages still in flight for the old file are dropped
+        self.path, self.offset, self.eof = path, 0, False
+        self.text.clear()
+        self.load_more()               # if a read is in flight, on_page starts this one
+
+    def load_more(self):
+        if self.eof or self.loading:
+            return
+        if self.reader:
+            self.reader.wait()         # already emitted its page; just let run() return
+        self.loading = True
+        self.reader = PageReader(self.gen, self.path, self.offset)
+        self.reader.page.connect(self.on_page)
+        self.reader.start()
+
+    def on_page(self, gen, text, nxt, eof):
+        self.loading = False
+        if gen != self.gen:
+            self.load_more()           # stale page: read the file that is open now
+            return
+        self.offset, self.eof = nxt, eof
+        # appending scrolls the view; keep the reader's position and don't
+        # let that count as a scroll to the bottom
+        bar = self.text.verticalScrollBar()
+        pos = bar.value()
+        bar.blockSignals(True)
+        self.text.appendPlainText(text.rstrip("\n"))
+        bar.setValue(pos)
+        bar.blockSignals(False)
+        if bar.maximum() == 0:         # page didn't fill the view yet
+            self.load_more()
+
+    def maybe_load_more(self, *_):
+        bar = self.text.verticalScrollBar()
+        if bar.value() >= bar.maximum() - bar.pageStep():     # user scrolled near the bottom
+            self.load_more()
+
+    def done(self, result):
+        if self.reader:
+            self.reader.wait()         # a page read takes milliseconds
+        super().done(result)
+
+class PreviewLoader(QThread):
+    """
+    Decodes the snapshot off the GUI thread, straight to preview size:
+    QImageReader with a scaled size lets the JPEG decoder skip detail
+    instead of building a full-resolution image first.
+    """
+    ready = pyqtSignal(int, QImage, float)         # generation, image, decode ms
+
+    def __init__(self, gen, jpeg_b64: str, size: QSize = PREVIEW_SIZE):
+        super().__init__()
+        self.gen, self.jpeg_b64, self.size = gen, jpeg_b64, size
+
+    def run(self):
+        t0 = time.perf_counter()
+        buf = QBuffer()
+        buf.setData(QByteArray(base64.b64decode(self.jpeg_b64)))
+        buf.open(QIODevice.OpenModeFlag.ReadOnly)
+        reader = QImageReader(buf, b"jpg")
+        src = reader.size()
+        if src.isValid():
+            reader.setScaledSize(src.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio))
+        img = reader.read()
+        self.ready.emit(self.gen, img, (time.perf_counter() - t0) * 1000)
+
+class _LineEmitter:
+    """File-like sink that turns print() output into one signal per line."""
+
+    def __init__(self, emit):
+        self.emit = emit
+        self.buf  = ""
+
+    def write(self, s):
+        self.buf += s
+        *lines, self.buf = self.buf.split("\n")
+        for line in lines:
+            self.emit(line.rstrip())
+        return len(s)
+
+    def flush(self):
+        pass
+
 class Worker(QThread):
     out  = pyqtSignal(str)
     err  = pyqtSignal(str)
     done = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, mode: str = "inprocess"):
         super().__init__()
-        self.proc: subprocess.Popen | None = None 
+        self.mode = mode
+        self.proc = None                 # subprocess.Popen in subprocess mode
 
     def run(self):
+        if self.mode == "inprocess":
+            self.run_inprocess()
+        else:
+            self.run_subprocess()
+        self.done.emit()
+
+    def run_inprocess(self):
+        # pipeline + stage modules are imported once and reused on every run
+        import run_automations, stages
+        sink = _LineEmitter(self.out.emit)
+        with stages.route_stdout(sink):
+            try:
+                run_automations.main([])
+            except cancel.Cancelled:
+                pass
+            except Exception as e:
+                self.err.emit(f"ERROR: pipeline crashed: {e}")
+        if sink.buf:
+            self.out.emit(sink.buf.rstrip())
+
+    def run_subprocess(self):
+        import subprocess
         if not os.path.exists(RUN_SCRIPT):
             self.err.emit(f"ERROR: {RUN_SCRIPT} not found")
             return
@@ -91,25 +284,56 @@ class Worker(QThread):
             self.out.emit(line.rstrip())
 
         self.proc.wait()
-        self.done.emit()
 
-    def stop(self):
-        if not self.proc or self.proc.poll() is not None:
-            return            # already finished
-        try:
-            parent = psutil.Process(self.proc.pid)
-            for child in parent.children(recursive=True):
-                child.kill()
-            parent.kill()
-        except Exception:
-            pass
+    def stop(self, limit=SHUTDOWN_LIMIT) -> list:
+        """
+        Cancel the run and wait at most `limit` seconds; returns what was
+        cleaned up.  In-process the stages are cancelled cooperatively
+        (cancel.py); a subprocess run has its whole process tree killed.
+        """
+        t0, report = time.perf_counter(), []
+        if self.mode == "inprocess":
+            res = cancel.request(limit)
+            report += res["released"] + [f"{n} (still closing)" for n in res["pending"]]
+        elif self.proc and self.proc.poll() is None:
+            try:
+                import psutil
+                parent = psutil.Process(self.proc.pid)
+                procs  = parent.children(recursive=True) + [parent]
+                for p in procs:
+                    p.kill()
+                report.append(f"pipeline process tree ({len(procs)} processes)")
+            except Exception:
+                pass
+        left = max(0.0, limit - (time.perf_counter() - t0))
+        report.append("pipeline thread" if self.wait(int(left * 1000))
+                      else "pipeline thread (still in a blocking call, left to finish)")
+        return report
 
 class AutomationUI(QWidget):
+    config_changed = pyqtSignal(object)            # queued onto the GUI thread
+
     def __init__(self):
         super().__init__()
         # keep window above Chrome
         self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint, True)
+        self.progress = {}
+        self.loaders  = []
+        self.preview_gen = 0
+        self.handlers = {
+            "snap_complete": self.on_snap,
+            "progress":      self.on_progress,
+            "match":         self.on_match,
+            "result_url":    self.on_result_url,
+            "summary":       self.on_summary,
+        }
+        self.ui_spans = []
+        self.first_paint_ms = None
+        self.waiting_ms = 0.0                      # time spent in the consent dialog
         self.build_ui()
+        self.config_changed.connect(self.on_config)
+        self.unsubscribe = config.subscribe(self.config_changed.emit)
+        self.watch_config()
 
     # ---------------- UI LAYOUT ----------------
     def build_ui(self):
@@ -117,15 +341,31 @@ class AutomationUI(QWidget):
         self.resize(900, 800)
 
         self.btn_run   = QPushButton("Run Automation")
+        self.btn_stop  = QPushButton("Stop")
+        self.btn_stop.setEnabled(False)
         self.btn_edit  = QPushButton("Edit Config")
         self.btn_logs  = QPushButton("View Logs")
+        self.btn_purge = QPushButton("Purge Result Cache")
         self.btn_run.clicked.connect(self.start_automation)
+        self.btn_stop.clicked.connect(self.stop_automation)
+        self.btn_purge.clicked.connect(self.purge_cache)
         self.btn_edit.clicked.connect(self.edit_config)
         self.btn_logs.clicked.connect(self.view_logs)
 
         self.result_label  = QLabel("Search Results URL:")
-        self.result_box    = QTextEdit(readOnly=True)
-        self.log_box       = QTextEdit(readOnly=True)
+        ui_cfg = config.get()["ui"]
+
+        # matches live in a model; the view only paints the visible rows
+        self.result_model  = QStandardItemModel(self)
+        self.result_view   = QListView()
+        self.result_view.setModel(self.result_model)
+        self.result_view.setUniformItemSizes(True)
+        self.result_view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.result_view.doubleClicked.connect(self.open_result)
+
+        # bounded log: oldest lines are dropped past the block limit
+        self.log_box       = QPlainTextEdit(readOnly=True)
+        self.log_box.setMaximumBlockCount(int(ui_cfg["log_max_blocks"]))
         self.image_label   = QLabel("Picture will appear here")
         self.image_label.setFixedSize(512, 384)
         self.image_label.setStyleSheet("border:1px solid black")
@@ -136,17 +376,26 @@ class AutomationUI(QWidget):
         self.status_label.setStyleSheet("color:gray;border:2px solid gray;padding:4px")
 
         lay = QVBoxLayout(self)
-        lay.addWidget(self.btn_run); lay.addWidget(self.btn_edit); lay.addWidget(self.btn_logs)
+        lay.addWidget(self.btn_run); lay.addWidget(self.btn_stop); lay.addWidget(self.btn_edit); lay.addWidget(self.btn_logs)
+        lay.addWidget(self.btn_purge)
         lay.addWidget(self.image_label); lay.addWidget(self.status_label)
-        lay.addWidget(self.result_label); lay.addWidget(self.result_box)
+        lay.addWidget(self.result_label); lay.addWidget(self.result_view)
         lay.addWidget(QLabel("Logs:")); lay.addWidget(self.log_box)
 
         # searching animation timer
         self.timer = QTimer(); self.timer.timeout.connect(self.tick)
         self.dots = 0
 
-    # ---------------- slots ----------------
+        # output batching: lines/results queue up and are painted together
+        self.pending_log     = []
+        self.pending_results = []
+        self.flush_timer = QTimer(); self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(int(ui_cfg["flush_ms"]))
+        self.flush_timer.timeout.connect(self.flush_output)
 
+    # ---------------- consent ----------------
+    def confirm_consent(self) -> bool:
+        """Shown once at start-up, before the window; False means exit."""
         warning = (
             "Warning – running this application will submit a photograph to "
             "external services. These services will extract biometric face "
@@ -166,84 +415,211 @@ class AutomationUI(QWidget):
         box.setText(warning)
         btn_continue = box.addButton("Continue", QMessageBox.ButtonRole.AcceptRole)
         btn_exit     = box.addButton("Exit",     QMessageBox.ButtonRole.RejectRole)
+        t0 = time.perf_counter()
         box.exec()
+        self.waiting_ms += (time.perf_counter() - t0) * 1000   # not start-up time
+
+        return box.clickedButton() is not btn_exit
+
+    # ---------------- start-up ----------------
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - T_START) * 1000 - self.waiting_ms
+            QTimer.singleShot(0, self.after_first_paint)
+
+    def after_first_paint(self):
+        """Work the first frame doesn't need: the timing line and the warm camera."""
+        evt = events.make("metric", stage="ui", name="first_paint", ms=round(self.first_paint_ms, 1))
+        print(events.encode(evt), flush=True)
+        self.log_box.appendPlainText(events.render(evt))
+        self.start_camera()                      # imports cv2 – keep it off the first paint
+        if "--exit-after-paint" in sys.argv:
+            QApplication.quit()
 
-        if box.clickedButton() is btn_exit:
-            QApplication.instance().quit()
-            return                      # do nothing / stay in UI
-        
+    # ---------------- slots ----------------
     def start_automation(self):
-        self.log_box.clear(); self.result_box.clear();
+        self.pending_log.clear(); self.pending_results.clear()
+        self.log_box.clear(); self.result_model.clear(); self.progress.clear()
+        self.ui_spans.clear()
         self.status_label.setText("Searching"); self.status_label.setStyleSheet("color:lime;border:2px solid lime;padding:4px")
         self.timer.start(500)
         # clears old image
+        self.preview_gen += 1
         self.image_label.clear()
 
-        self.thread = Worker()
+        cancel.reset()
+        self.thread = Worker(self.stage_mode())
         self.thread.out.connect(self.handle_output)
         self.thread.err.connect(self.handle_output)
         self.thread.done.connect(self.finish)
+        self.btn_run.setEnabled(False); self.btn_stop.setEnabled(True)
         self.thread.start()
 
-    def handle_output(self, line:str):
-        self.log_box.append(line)
-        if line == "SNAP_COMPLETE":
-            self.refresh_image()
-        if "Search Results URL:" in line:
-            url = line.split("Search Results URL:")[-1].strip()
-            self.result_box.setPlainText(url)
-            self.status_label.setText("Search Complete")
-            self.timer.stop()
-
-        if line.startswith("FACECHECK_MATCH"):
-            _, score, url = line.split(maxsplit=2)
-            self.result_box.append(f"FaceCheck {score}%  {url}")
-
-        if "Search Results URL:" in line:           # PimEyes line
-            url = line.split("Search Results URL:")[-1].strip()
-            self.result_box.append(f"PimEyes   {url}")
-            self.status_label.setText("Search Complete")
-            self.timer.stop()
+    def running(self) -> bool:
+        # self.thread is only a Worker once a run started (before that it is QObject.thread)
+        return isinstance(self.thread, Worker) and self.thread.isRunning()
+
+    def stop_automation(self):
+        if not self.running():
+            return
+        t0 = time.perf_counter()
+        report = self.thread.stop()
+        self.timer.stop(); self.btn_stop.setEnabled(False)
+        self.status_label.setText("Stopped")
+        self.pending_log.append(f"stopped in {(time.perf_counter() - t0) * 1000:.0f} ms – "
+                                f"released: {', '.join(report)}")
+        self.flush_output()
 
+    def handle_output(self, line:str):
+        evt = events.decode(line)                 # one decode per line
+        self.pending_log.append(events.render(evt))
+        handler = self.handlers.get(evt["type"])
+        if handler:
+            handler(evt)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def ui_metric(self, name, ms):
+        self.ui_spans.append(events.make("metric", stage="ui", name=name, ms=round(ms, 1)))
+
+    def on_summary(self, evt):
+        ui = metrics.summarize(self.ui_spans)
+        if ui:
+            self.pending_log.extend(events.format_spans(ui)[1:])   # same table, UI rows
+
+    def flush_output(self):
+        if not (self.pending_log or self.pending_results):
+            return
+        t0 = time.perf_counter()
+        self.flush_log_and_results()
+        self.ui_metric("render", (time.perf_counter() - t0) * 1000)
+
+    def flush_log_and_results(self):
+        if self.pending_log:
+            self.log_box.appendPlainText("\n".join(self.pending_log))
+            self.pending_log.clear()
+        if self.pending_results:
+            for item in self.pending_results:
+                self.result_model.appendRow(item)
+            self.pending_results.clear()
+
+    def add_result(self, text, url, cached=False):
+        item = QStandardItem(text + ("  (cached)" if cached else ""))
+        item.setData(url, Qt.ItemDataRole.UserRole)
+        item.setToolTip(url)
+        self.pending_results.append(item)
+
+    def open_result(self, index):
+        url = index.data(Qt.ItemDataRole.UserRole)
+        if url:
+            QDesktopServices.openUrl(QUrl(url))
+
+    def on_snap(self, evt):
+        self.preview_gen += 1
+        loader = PreviewLoader(self.preview_gen, evt.get("jpeg", ""))
+        loader.ready.connect(self.set_preview)
+        loader.finished.connect(lambda: self.loaders.remove(loader))
+        self.loaders.append(loader)              # keep alive until finished
+        loader.start()
+
+    def on_progress(self, evt):
+        self.progress[evt.get("stage")] = evt.get("percent")
+
+    def on_match(self, evt):
+        name = PROVIDER_NAMES.get(evt.get("stage"), evt.get("stage"))
+        self.add_result(f"{name} {evt.get('score')}%  {evt.get('url')}", evt.get("url"), evt.get("cached"))
+
+    def on_result_url(self, evt):
+        name = PROVIDER_NAMES.get(evt.get("stage"), evt.get("stage"))
+        self.add_result(f"{name:<9} {evt.get('url')}", evt.get("url"), evt.get("cached"))
+        # providers run in parallel – keep animating until finish()
 
     def finish(self):
+        self.flush_output()
+        self.btn_run.setEnabled(True); self.btn_stop.setEnabled(False)
         if self.timer.isActive():
             self.timer.stop(); self.status_label.setText("Finished")
 
     def tick(self):
         self.dots = (self.dots+1)%4
-        self.status_label.setText("Searching"+"."*self.dots)
-
-    def refresh_image(self):
-        if os.path.exists(IMAGE_PATH):
-            pix = QPixmap(IMAGE_PATH)
-            self.image_label.setPixmap(pix.scaled(512,384, Qt.AspectRatioMode.KeepAspectRatio))
+        extra = "  ".join(f"{PROVIDER_NAMES.get(k, k)} {v}%" for k, v in self.progress.items())
+        self.status_label.setText("Searching"+"."*self.dots + (f"  ({extra})" if extra else ""))
+
+    def set_preview(self, gen, img: QImage, ms: float = 0.0):
+        self.ui_metric("preview_decode", ms)
+        if gen != self.preview_gen:
+            return                               # a newer snapshot is on its way
+        if img.isNull():
+            self.image_label.setText("Image not available")
         else:
-            self.image_label.setText("Image not found")
+            self.image_label.setPixmap(QPixmap.fromImage(img))
 
     # ---------- config & log helpers ----------
-    def edit_config(self):
-        cfg = {}
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                    cfg = json.load(f)
-            except json.JSONDecodeError:
-                QMessageBox.warning(self, "Error", "Config file is corrupted; loading defaults.")
+    def stage_mode(self) -> str:
+        return config.get()["stage_mode"]
 
-        dlg = ConfigDialog(cfg, self)
+    def edit_config(self):
+        dlg = ConfigDialog(config.get(), self)
         if dlg.exec():
-            new_cfg = dlg.values()
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                json.dump(new_cfg, f, indent=2)
+            token = dlg.new_token()
+            if token is not None:
+                config.set_api_token("facecheck", token)
+            config.update(dlg.values())          # subscribers (on_config) apply it
             QMessageBox.information(self, "Saved", "Settings updated.")
 
+    def watch_config(self):
+        """Hand edits of config.json reach on_config right away, not at the next run."""
+        path = os.path.abspath(config.CONFIG_FILE)
+        self.cfg_watcher = QFileSystemWatcher([os.path.dirname(path)], self)
+        self.cfg_reload = QTimer(self); self.cfg_reload.setSingleShot(True)
+        self.cfg_reload.setInterval(200)          # let an editor finish writing
+        self.cfg_reload.timeout.connect(config.get)   # notifies subscribers if it changed
+
+        def changed(_):
+            if os.path.exists(path) and path not in self.cfg_watcher.files():
+                self.cfg_watcher.addPath(path)    # atomic saves replace the watched file
+            self.cfg_reload.start()
+        changed(None)
+        self.cfg_reload.stop()
+        self.cfg_watcher.fileChanged.connect(changed)
+        self.cfg_watcher.directoryChanged.connect(changed)
+
+    def on_config(self, cfg):
+        """Pushed by config.py after every change (dialog or hand edit)."""
+        self.log_box.setMaximumBlockCount(int(cfg["ui"]["log_max_blocks"]))
+        self.flush_timer.setInterval(int(cfg["ui"]["flush_ms"]))
+        self.start_camera(cfg)
 
     def view_logs(self):
-        file, _ = QFileDialog.getOpenFileName(self, "Select log", LOG_DIR, "Text Files (*.txt)")
-        if file:
-            with open(file, "r", encoding="utf-8") as f:
-                self.log_box.setPlainText(f.read())
+        logs  = config.get()["logs"]          # unknown keys are kept by config, not wanted here
+        store = log_store.LogStore(LOG_DIR, **{k: logs[k] for k in log_store.DEFAULTS})
+        LogViewer(store, self).exec()
+
+    def purge_cache(self):
+        import result_cache
+        n = result_cache.purge()
+        QMessageBox.information(self, "Cache purged", f"Removed {n} cached result(s).")
+
+    def purge_on_exit(self):
+        if config.get()["cache"]["purge_on_exit"]:
+            import result_cache
+            result_cache.purge()
+
+    def start_camera(self, cfg=None):
+        """Optional warm camera: opened once, reused by every in-process run."""
+        cfg = cfg or config.get()
+        if cfg["warm_camera"] and cfg["stage_mode"] == "inprocess":
+            import capture_service
+            capture_service.start(cfg["camera_source"] or cfg["webcam_index"])   # no-op if unchanged
+        elif "capture_service" in sys.modules:
+            sys.modules["capture_service"].stop()
+
+    def on_quit(self):
+        self.unsubscribe()
+        self.purge_on_exit()
+        if "capture_service" in sys.modules:
+            sys.modules["capture_service"].stop()
 
     def get_editor(self, title, default=""):
         from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTextEdit, QPushButton
@@ -260,37 +636,63 @@ class AutomationUI(QWidget):
         return "", False
     
     def closeEvent(self, event):
-    # 1. stop animation
-        if self.timer.isActive():
-            self.timer.stop()
-
-    # 2. release Pixmap → unlock file
-        self.image_label.clear()
-        QApplication.processEvents()          # force UI repaint
-
-    # 3. terminate subprocess group
-    try:
-        if hasattr(self, "thread") and self.thread.isRunning():
-            self.thread.stop()
-            self.thread.wait(5000)        # up to 5 s
-    except Exception:
-        pass
-
-    # 4. delete captured JPG (retry a couple of times)
-    img = os.path.abspath(os.path.join("Source_Images", "Webcam_Capture.jpg"))
-    for _ in range(5):
-        try:
-            if os.path.exists(img):
-                os.remove(img)
-            break
-        except PermissionError:
-            import time; time.sleep(0.5)
-    
-    def closeEvent(self, event):
+        """Bounded shutdown: the run, preview decoders and camera are released
+        within about SHUTDOWN_LIMIT, and what was cleaned up is printed."""
+        t0 = time.perf_counter()
+        self.timer.stop(); self.flush_timer.stop()
+        report = self.thread.stop() if self.running() else []
+        for loader in list(self.loaders):            # preview decodes take a few ms
+            loader.wait(50)
+        if "capture_service" in sys.modules:
+            cam = sys.modules["capture_service"].stop()
+            if cam:
+                report.append(cam)
+        print(f"shutdown in {(time.perf_counter() - t0) * 1000:.0f} ms – released: "
+              f"{', '.join(report) or 'nothing running'}")
         event.accept()
 
+def profile_imports(top=25):
+    """
+    Start the UI under `python -X importtime` until its first paint and print
+    the slowest imports (cumulative, i.e. including what they pull in).
+    """
+    import subprocess
+    proc = subprocess.run([sys.executable, "-X", "importtime", os.path.abspath(__file__),
+                           "--exit-after-paint"], capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cum, name = line[len("import time:"):].split("|", 2)
+        if own.strip().isdigit():                # skip the header row
+            rows.append((int(cum) / 1000, int(own) / 1000, name.rstrip()))
+    print(f"{'import':<48}{'cumulative ms':>14}{'self ms':>10}")
+    for cum, own, name in sorted(rows, reverse=True)[:top]:
+        print(f"{name[:48]:<48}{cum:>14.1f}{own:>10.1f}")
+    print(f"{len(rows)} modules imported")
+    for line in proc.stdout.splitlines():
+        evt = events.decode(line)
+        if evt["type"] == "metric":
+            print(events.render(evt))
+    return proc.returncode
+
 if __name__ == "__main__":
+    if "--profile-imports" in sys.argv:
+        sys.exit(profile_imports())
     app = QApplication(sys.argv)
     w = AutomationUI()
+    # --exit-after-paint (start-up timing) never runs anything, so no consent needed
+    if "--exit-after-paint" not in sys.argv and not w.confirm_consent():
+        sys.exit(0)
+    app.aboutToQuit.connect(w.on_quit)
     w.showMaximized()
-    sys.exit(app.exec())
+    code = app.exec()
+    if w.running():
+        # a stage is stuck in a blocking call: let slow releases (driver.quit) and
+        # the run's own finally blocks (log record) finish, but not for long
+        t0 = time.monotonic()
+        cancel.join(EXIT_GRACE)
+        w.thread.wait(max(0, int((EXIT_GRACE - (time.monotonic() - t0)) * 1000)))
+        if w.running():
+            os._exit(code)
+    sys.exit(code)